@@ -0,0 +1,192 @@
+"""ASGI serving mode.
+
+    uvicorn asgi:app --workers 4
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+The I/O-bound routes that see bursts of traffic (the form page, the draft
+listing, search and autosave) run natively on the event loop with asyncpg,
+so a waiting query no longer holds a thread. Every other route is served by
+the Flask app in strat_app.py through a thread pool, unchanged. PDF renders
+from those routes run in that pool's threads (and in the render processes
+when PDF_RENDER_PROCESSES > 0), never on the loop.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import wraps
+from urllib.parse import urlencode
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import Accept
+from werkzeug.http import is_resource_modified, parse_accept_header
+
+import async_db
+import compression
+import draft_listing
+import metrics
+import storage
+import strat_app
+
+ASGI_WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", 32))  # threads serving the Flask routes
+ASGI_BLOCKING_THREADS = int(os.environ.get("ASGI_BLOCKING_THREADS", 4))  # template renders, autosave flushes
+USER_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+_blocking = ThreadPoolExecutor(max_workers=ASGI_BLOCKING_THREADS, thread_name_prefix="asgi-blocking")
+
+
+async def _run_blocking(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_blocking, func, *args)
+
+
+async def _user(request):
+    # (users.id, cookie id); mirrors strat_app.get_or_create_user_id.
+    cookie_id = request.cookies.get("user_id") or str(uuid.uuid4())
+    return await async_db.resolve_user_id(cookie_id), cookie_id
+
+
+def _respond(request, body, media_type, cookie_id=None, status_code=200, headers=None):
+    # Same negotiation and cookie handling as the Flask after_request hooks.
+    headers = dict(headers or {})
+    headers["Vary"] = ", ".join(filter(None, [headers.get("Vary"), "Accept-Encoding"]))
+    if len(body) >= compression.COMPRESS_MIN_SIZE:
+        encoding = compression.choose_encoding(parse_accept_header(request.headers.get("accept-encoding"), Accept))
+        if encoding:
+            body = compression.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            if headers.get("ETag", "").startswith('"'):
+                headers["ETag"] = "W/" + headers["ETag"]
+    response = Response(body, status_code=status_code, media_type=media_type, headers=headers)
+    if cookie_id:
+        response.set_cookie("user_id", cookie_id, max_age=USER_COOKIE_MAX_AGE)
+    return response
+
+
+def _json(request, payload, cookie_id=None, status_code=200):
+    return _respond(request, json.dumps(payload).encode(), "application/json", cookie_id, status_code)
+
+
+def _int_arg(request, name, default):
+    try:
+        return int(request.query_params.get(name, default))
+    except ValueError:
+        return default
+
+
+def _timed(endpoint):
+    # Records the same request histogram as the Flask routes.
+    def decorate(handler):
+        if not metrics.METRICS_ENABLED:
+            return handler
+
+        @wraps(handler)
+        async def wrapper(request):
+            start = time.perf_counter()
+            response = await handler(request)
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start,
+                            endpoint=endpoint, method=request.method, status=response.status_code)
+            return response
+        return wrapper
+    return decorate
+
+
+def _render_form(path, query_string, data, first_page, draft_name):
+    # form.html calls url_for, which needs a Flask request context.
+    with strat_app.app.test_request_context(path, query_string=query_string):
+        return strat_app.render_form(data, first_page, draft_name)
+
+
+@_timed("form")
+async def form(request):
+    draft_name = request.query_params.get("draft")
+    user_id, cookie_id = await _user(request)
+    if draft_name:
+        # The autosave buffer writes through psycopg2; keep that off the loop.
+        await _run_blocking(strat_app.autosave_buffer.flush, user_id, draft_name)
+    version = tuple(await async_db.fetchrow(draft_listing.LIST_VERSION_SQL, (draft_name, user_id)))
+    etag = strat_app.form_etag(user_id, draft_name, version)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache", "Vary": "Cookie"}
+    # ETag only, as in strat_app.form.
+    if not is_resource_modified({"HTTP_IF_NONE_MATCH": request.headers.get("if-none-match")}, etag=etag):
+        response = Response(status_code=304, headers=headers)
+        response.set_cookie("user_id", cookie_id, max_age=USER_COOKIE_MAX_AGE)
+        return response
+
+    data = strat_app.draft_cache.get(user_id, draft_name, version[2]) if draft_name and version[2] else {}
+    if data is None:
+        data = await async_db.load_draft(user_id, draft_name)
+        strat_app.draft_cache.put(user_id, draft_name, version[2], data)
+    first_page = await async_db.list_page(user_id)
+    html = await _run_blocking(_render_form, request.url.path, request.url.query, data, first_page, draft_name)
+    return _respond(request, html.encode(), "text/html; charset=utf-8", cookie_id, headers=headers)
+
+
+@_timed("draft_index")
+async def draft_index(request):
+    user_id, cookie_id = await _user(request)
+    limit = _int_arg(request, "limit", draft_listing.DRAFT_LIST_PAGE_SIZE)
+    try:
+        drafts, next_cursor = await async_db.list_page(user_id, request.query_params.get("after"), limit)
+    except ValueError as e:
+        return _json(request, {"error": str(e)}, cookie_id, 400)
+    return _json(request, {"drafts": drafts, "next": next_cursor}, cookie_id)
+
+
+@_timed("search_drafts")
+async def search_drafts(request):
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return _json(request, {"error": "missing q"}, status_code=400)
+    user_id, cookie_id = await _user(request)
+    result = await async_db.search_drafts(user_id, query, _int_arg(request, "page", 1),
+                                          _int_arg(request, "per_page", 20))
+    for hit in result["results"]:
+        hit["url"] = "/?" + urlencode({"draft": hit["name"]})
+    return _json(request, result, cookie_id)
+
+
+@_timed("autosave_draft")
+async def autosave_draft(request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+    fields = strat_app.autosave_fields(payload)
+    if fields is None:
+        return _json(request, {"error": strat_app.AUTOSAVE_FORMAT_ERROR}, status_code=400)
+    cookie_id = None
+    if fields:
+        # Only buffers in memory; the flusher thread does the write.
+        user_id, cookie_id = await _user(request)
+        strat_app.autosave_buffer.add(user_id, request.path_params["name"], fields)
+    return _json(request, {"queued": len(fields)}, cookie_id, 202)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if not isinstance(strat_app.store, storage.PostgresStorage):
+        raise RuntimeError("the ASGI mode reads drafts through asyncpg and needs STORAGE_BACKEND=postgres")
+    await async_db.open_pool()
+    try:
+        yield
+    finally:
+        await async_db.close_pool()
+        _blocking.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/", form, methods=["GET"]),
+        Route("/drafts", draft_index, methods=["GET"]),
+        Route("/drafts/search", search_drafts, methods=["GET"]),
+        Route("/drafts/{name:path}/autosave", autosave_draft, methods=["POST"]),
+        Mount("/", app=WSGIMiddleware(strat_app.app, workers=ASGI_WSGI_THREADS)),
+    ],
+    lifespan=lifespan,
+)
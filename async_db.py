@@ -0,0 +1,81 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+import draft_listing
+import draft_search
+from db import DB_POOL_MAX, DB_POOL_MIN, DB_POOL_TIMEOUT
+from identity import UPSERT_USER_SQL, cached_user_id, remember_user_id
+
+# --- Non-blocking draft helpers for the ASGI app (asgi.py) ---
+# One asyncpg pool per process, opened in the ASGI lifespan. Queries are the
+# same SQL the psycopg2 helpers run, with %s placeholders numbered for asyncpg.
+_pool = None
+
+
+@lru_cache(maxsize=None)
+def _numbered(sql):
+    counter = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%s", lambda _: f"${next(counter)}", sql)
+
+
+async def _init_connection(conn):
+    # Match psycopg2, which hands back JSONB as Python objects.
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def open_pool():
+    global _pool
+    import asyncpg
+    _pool = await asyncpg.create_pool(
+        os.environ.get("DATABASE_URL"), min_size=DB_POOL_MIN, max_size=DB_POOL_MAX,
+        timeout=DB_POOL_TIMEOUT, init=_init_connection,
+    )
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetch(sql, params):
+    return await _pool.fetch(_numbered(sql), *params)
+
+
+async def fetchrow(sql, params):
+    return await _pool.fetchrow(_numbered(sql), *params)
+
+
+async def resolve_user_id(cookie_id):
+    db_user_id = cached_user_id(cookie_id)
+    if db_user_id is not None:
+        return db_user_id
+    row = None
+    # Same retry as storage.PostgresStorage.upsert_user for a concurrent first visit.
+    for _ in range(2):
+        row = await fetchrow(UPSERT_USER_SQL, (cookie_id, cookie_id))
+        if row:
+            break
+    if row is None:
+        raise RuntimeError(f"could not resolve user for cookie {cookie_id!r}")
+    remember_user_id(cookie_id, row[0])
+    return row[0]
+
+
+async def load_draft(user_id, name):
+    row = await fetchrow("SELECT content FROM drafts WHERE name = %s AND user_id = %s", (name, user_id))
+    return row[0] if row else {}
+
+
+async def list_page(user_id, after=None, limit=draft_listing.DRAFT_LIST_PAGE_SIZE):
+    sql, params, limit = draft_listing.page_query(user_id, after, limit)
+    return draft_listing.page_result(await fetch(sql, params), limit)
+
+
+async def search_drafts(user_id, query, page=1, per_page=20):
+    params, page, per_page = draft_search.search_query(user_id, query, page, per_page)
+    return draft_search.search_result(await fetch(draft_search.SEARCH_SQL, params), query, page, per_page)
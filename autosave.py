@@ -0,0 +1,187 @@
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+# --- Debounced autosave ---
+# Field-level edits are merged per (user_id, draft name) in memory and written
+# in one batch every AUTOSAVE_FLUSH_INTERVAL seconds, so a burst of keystrokes
+# becomes a single small JSONB merge instead of one full-row write per edit.
+AUTOSAVE_FLUSH_INTERVAL = float(os.environ.get("AUTOSAVE_FLUSH_INTERVAL", 2))
+AUTOSAVE_MAX_PENDING = int(os.environ.get("AUTOSAVE_MAX_PENDING", 500))  # drafts buffered before an early flush
+# Flushes a draft's edits may fail (e.g. while the database is down) before
+# they are logged and dropped, so one bad row cannot wedge the buffer.
+AUTOSAVE_MAX_ATTEMPTS = int(os.environ.get("AUTOSAVE_MAX_ATTEMPTS", 5))
+
+log = logging.getLogger(__name__)
+
+
+class AutosaveBuffer:
+    def __init__(self, writer, interval=AUTOSAVE_FLUSH_INTERVAL, max_pending=AUTOSAVE_MAX_PENDING,
+                 max_attempts=AUTOSAVE_MAX_ATTEMPTS):
+        # writer([(user_id, name, fields)]) persists one batch.
+        self.writer = writer
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = {}  # (user_id, name) -> {field: value}
+        self._attempts = {}  # (user_id, name) -> failed flushes of its pending edits
+        self._lock = threading.Lock()
+        # (user_id, name) -> [lock, holders]. A draft's lock is held from taking
+        # its edits until they are written, and around full saves and deletes,
+        # so writes for a draft land in the order they were made. Drafts with
+        # nothing pending or in flight need no lock at all.
+        self._draft_locks = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def _ensure_flusher(self):
+        # Threads do not survive a fork; each worker starts its own flusher.
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="autosave-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("autosave flush failed")
+
+    def add(self, user_id, name, fields):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pending = {}
+                self._attempts = {}
+            self._ensure_flusher()
+            self._pending.setdefault((user_id, name), {}).update(fields)
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self._wake.set()
+        return pending
+
+    @contextmanager
+    def _locked(self, keys):
+        # Per-draft locks, taken in sorted order so multi-draft batches cannot deadlock.
+        keys = sorted(set(keys))
+        with self._lock:
+            entries = [self._draft_locks.setdefault(key, [threading.Lock(), 0]) for key in keys]
+            for entry in entries:
+                entry[1] += 1
+        try:
+            for entry in entries:
+                entry[0].acquire()
+            try:
+                yield
+            finally:
+                for entry in reversed(entries):
+                    entry[0].release()
+        finally:
+            with self._lock:
+                for key, entry in zip(keys, entries):
+                    entry[1] -= 1
+                    if entry[1] == 0:
+                        del self._draft_locks[key]
+
+    def _take(self, keys):
+        with self._lock:
+            return {key: self._pending.pop(key) for key in keys if key in self._pending}
+
+    def _write_rows(self, rows):
+        # Writes rows as one batch; if that fails, one at a time, so a single
+        # bad row cannot hold back the rest. Returns [(row, error)] for the rows
+        # that still failed.
+        try:
+            self.writer(rows)
+            return []
+        except Exception as e:
+            if len(rows) == 1:
+                return [(rows[0], e)]
+        failed = []
+        for row in rows:
+            try:
+                self.writer([row])
+            except Exception as e:
+                failed.append((row, e))
+        return failed
+
+    def _retry_or_drop(self, failed):
+        with self._lock:
+            for (user_id, name, fields), error in failed:
+                key = (user_id, name)
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(key, None)
+                    log.error("dropping autosave edits for draft %r of user %s after %d failed writes: %s",
+                              name, user_id, attempts, error)
+                    continue
+                self._attempts[key] = attempts
+                log.warning("autosave write for draft %r of user %s failed, will retry: %s", name, user_id, error)
+                # Keep newer edits that arrived while the write was failing.
+                self._pending[key] = {**fields, **self._pending.get(key, {})}
+
+    def flush(self, user_id=None, name=None):
+        # Writes buffered edits: all of them, or one draft's. Failed rows are
+        # put back for the next tick, then dropped after max_attempts.
+        with self._lock:
+            if user_id is None:
+                keys = list(self._pending)
+            elif (user_id, name) in self._pending or (user_id, name) in self._draft_locks:
+                keys = [(user_id, name)]
+            else:
+                return 0
+        if not keys:
+            return 0
+        with self._locked(keys):
+            batch = self._take(keys)
+            if not batch:
+                return 0
+            rows = [(uid, draft, fields) for (uid, draft), fields in batch.items()]
+            failed = self._write_rows(rows)
+            self._retry_or_drop(failed)
+        with self._lock:
+            for key in batch.keys() - {(uid, draft) for (uid, draft, _), _ in failed}:
+                self._attempts.pop(key, None)
+        return len(batch) - len(failed)
+
+    def write(self, rows):
+        # A full save. Buffered edits for the same drafts are older, so they go
+        # first in the same batch, and no batch already in flight can land after
+        # it. Edits that cannot be written are dropped rather than retried, as a
+        # retry would land on top of this save; a failure of the save itself is raised.
+        keys = [(uid, name) for uid, name, _ in rows]
+        with self._locked(keys):
+            batch = self._take(keys)
+            with self._lock:
+                for key in batch:
+                    self._attempts.pop(key, None)
+            older = [(uid, name, fields) for (uid, name), fields in batch.items()]
+            failed = self._write_rows(older + list(rows))
+        saved = {id(row) for row in rows}
+        for row, error in failed:
+            if id(row) not in saved:
+                log.error("dropping autosave edits for draft %r of user %s: %s", row[1], row[0], error)
+        for row, error in failed:
+            if id(row) in saved:
+                raise error
+
+    def delete(self, user_id, name, deleter):
+        # Drops buffered edits and runs deleter(user_id, name) under the draft's
+        # lock, so a batch already in flight cannot bring the draft back.
+        key = (user_id, name)
+        with self._locked([key]):
+            with self._lock:
+                self._pending.pop(key, None)
+                self._attempts.pop(key, None)
+            deleter(user_id, name)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,90 @@
+"""Measure what importing the app costs, per module.
+
+    python bench_imports.py                   # import strat_app
+    python bench_imports.py pdf_render -n 20  # any module, top 20 rows
+    python bench_imports.py --json            # machine-readable output
+
+Each run imports the module in a fresh interpreter with -X importtime and
+reports the median over --runs runs, so numbers are comparable across commits.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def _import_once(module):
+    env = dict(os.environ)
+    # The app must import without a reachable database.
+    env.setdefault("DATABASE_URL", "postgresql://localhost:1/unused")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": depth}
+    return wall, modules
+
+
+def measure(module, runs):
+    walls = []
+    samples = {}
+    for _ in range(runs):
+        wall, modules = _import_once(module)
+        walls.append(wall)
+        for name, row in modules.items():
+            samples.setdefault(name, []).append(row)
+
+    rows = []
+    for name, values in samples.items():
+        rows.append({
+            "module": name,
+            "self_ms": statistics.median(v["self_us"] for v in values) / 1000,
+            "cumulative_ms": statistics.median(v["cumulative_us"] for v in values) / 1000,
+            "depth": values[0]["depth"],
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return {
+        "module": module,
+        "runs": runs,
+        "interpreter_wall_ms": statistics.median(walls) * 1000,
+        "import_ms": next((row["cumulative_ms"] for row in rows if row["module"] == module), None),
+        "modules": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("module", nargs="?", default="strat_app")
+    parser.add_argument("-r", "--runs", type=int, default=5)
+    parser.add_argument("-n", "--top", type=int, default=25)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.runs)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"import {result['module']}: {result['import_ms']:.1f} ms "
+          f"(interpreter wall {result['interpreter_wall_ms']:.1f} ms, median of {result['runs']})")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in result["modules"][:args.top]:
+        print(f"{row['cumulative_ms']:14.2f} {row['self_ms']:9.2f}  {'  ' * row['depth']}{row['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Benchmarks for the render and persistence paths.
+
+    python -m benchmarks                      # every suite, human-readable
+    python -m benchmarks text render -r 50    # selected suites, 50 runs each
+    python -m benchmarks --json -o bench.json # machine-readable, for comparing commits
+
+Suites: text (wrapping and measuring), render (layout and reportlab), submit
+(/submit end to end through the Flask test client) and db (draft helpers
+against the configured STORAGE_BACKEND; run it once per backend to compare).
+"""
+import statistics
+import time
+
+
+def measure(func, runs, warmup=1):
+    # Median and spread of `runs` calls to func(), in milliseconds.
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "runs": runs,
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_ms": samples[0],
+        "max_ms": samples[-1],
+    }
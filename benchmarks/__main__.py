@@ -0,0 +1,71 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import benchmarks
+
+SUITES = ("text", "render", "submit", "db")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=benchmarks.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", metavar="suite", help=f"any of {', '.join(SUITES)} (default: all)")
+    parser.add_argument("-r", "--runs", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("-o", "--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+    # Validated here because argparse rejects an empty list for nargs="*" with choices.
+    unknown = sorted(set(args.suites) - set(SUITES))
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(unknown)}")
+
+    # Measure the work itself: no cached PDFs, no pool round trips, no disk writes.
+    os.environ["PDF_CACHE_BACKEND"] = "none"
+    os.environ["PDF_RENDER_PROCESSES"] = "0"
+    os.environ["PDF_EXPORT_ASYNC"] = "0"
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": args.runs,
+        "results": [],
+        "skipped": [],
+    }
+    for suite in args.suites or SUITES:
+        if suite == "db" and os.environ.get("STORAGE_BACKEND", "postgres") == "postgres" and not os.environ.get("DATABASE_URL"):
+            report["skipped"].append({"suite": suite, "reason": "DATABASE_URL is not set (or use STORAGE_BACKEND=sqlite)"})
+            continue
+        module = importlib.import_module(f"benchmarks.{suite}")
+        for row in module.run(args.runs):
+            report["results"].append({"suite": suite, **row})
+            if not args.json:
+                print(f"{row['benchmark']:<44} {row['median_ms']:10.3f} ms  (p95 {row['p95_ms']:.3f}, min {row['min_ms']:.3f})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for skipped in report["skipped"]:
+            print(f"skipped {skipped['suite']}: {skipped['reason']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import itertools
+import uuid
+
+from benchmarks import measure
+from benchmarks.drafts import typical_draft
+
+SEED_DRAFTS = 200
+
+
+def run(runs):
+    import strat_app
+    from identity import forget_user
+
+    # A throwaway user, so the numbers include a realistic draft count and
+    # nothing is left behind.
+    cookie_id = f"benchmark-{uuid.uuid4()}"
+    app = strat_app.app
+    results = []
+    with app.test_request_context("/", headers={"Cookie": f"user_id={cookie_id}"}):
+        user_id = strat_app.get_or_create_user_id()
+        try:
+            for i in range(SEED_DRAFTS):
+                strat_app.save_draft_to_db(f"draft-{i}", typical_draft(i))
+            data = typical_draft(0)
+            counter = itertools.count()
+
+            def save_changed():
+                strat_app.save_draft_to_db("draft-0", {**data, "Decision": f"Revision {next(counter)}"})
+
+            results.append({"benchmark": "db/save_changed", **measure(save_changed, runs)})
+            results.append({"benchmark": "db/save_unchanged",
+                            **measure(lambda: strat_app.save_draft_to_db("draft-1", typical_draft(1)), runs)})
+            results.append({"benchmark": "db/load_draft",
+                            **measure(lambda: strat_app.load_draft_from_db("draft-2"), runs)})
+            updated_at = strat_app.store.list_version(user_id, "draft-2")[2]
+            results.append({"benchmark": "db/load_draft_cached",
+                            **measure(lambda: strat_app.load_draft_from_db("draft-2", updated_at=updated_at), runs)})
+            results.append({"benchmark": "db/load_draft_projected",
+                            **measure(lambda: strat_app.load_draft_from_db("draft-2", ["Topic", "Decision"]), runs)})
+            results.append({"benchmark": "db/list_drafts_first_page",
+                            **measure(strat_app.list_drafts, runs)})
+            _, cursor = strat_app.list_drafts(limit=150)
+            results.append({"benchmark": "db/list_drafts_deep_page",
+                            **measure(lambda: strat_app.list_drafts(cursor), runs)})
+
+            def search():
+                strat_app.store.search_drafts(user_id, "volunteers training")
+
+            results.append({"benchmark": "db/search", **measure(search, runs)})
+        finally:
+            strat_app.store.delete_user(user_id)
+            forget_user(cookie_id)
+    backend = type(strat_app.store).__name__
+    return [{**row, "storage": backend} for row in results]
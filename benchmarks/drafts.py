@@ -0,0 +1,81 @@
+import random
+
+from schema import OPTION_FIELDS
+
+# --- Synthetic form data ---
+# Deterministic for a given seed so numbers are comparable across commits.
+WORDS = ("strategy budget volunteers outreach training coordinator funding campus chapter events "
+         "partnership donors timeline approval leadership communication risk revenue growth "
+         "students mentoring logistics venue marketing report review decision quarterly").split()
+
+TEXT_FIELDS = ("Problem", "Outcome", "Recommendation", "Decision")
+ACTION_FIELDS = tuple(f"Action{i}" for i in range(1, 6))
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def paragraph(rng, words):
+    parts = []
+    while words > 0:
+        n = min(words, rng.randint(8, 20))
+        parts.append(sentence(rng, n))
+        words -= n
+    return " ".join(parts)
+
+
+def _header(rng):
+    return {
+        "Topic": sentence(rng, 6),
+        "PointPerson": "Alex Morgan",
+        "Role": "Regional Director",
+        "Sponsor": "Jordan Lee",
+    }
+
+
+def short_draft(seed=0):
+    rng = random.Random(seed)
+    data = _header(rng)
+    data["Problem"] = sentence(rng, 10)
+    data["Recommendation"] = sentence(rng, 6)
+    return data
+
+
+def typical_draft(seed=0):
+    rng = random.Random(seed)
+    data = _header(rng)
+    for field in TEXT_FIELDS:
+        data[field] = paragraph(rng, 60)
+    for field in OPTION_FIELDS[:10]:
+        data[field] = sentence(rng, 12)
+    for field in ACTION_FIELDS[:3]:
+        data[field] = sentence(rng, 10)
+    return data
+
+
+def long_fields_draft(seed=0):
+    # Pathological: every text field is pages long, and one word is wider than its column.
+    rng = random.Random(seed)
+    data = _header(rng)
+    for field in TEXT_FIELDS + ACTION_FIELDS:
+        data[field] = paragraph(rng, 1500)
+    data["Problem"] += " " + "x" * 400
+    return data
+
+
+def many_options_draft(seed=0):
+    # Every option cell is filled, so the options table splits across pages.
+    rng = random.Random(seed)
+    data = typical_draft(seed)
+    for field in OPTION_FIELDS:
+        data[field] = paragraph(rng, 80)
+    return data
+
+
+DRAFTS = {
+    "short": short_draft,
+    "typical": typical_draft,
+    "long_fields": long_fields_draft,
+    "many_options": many_options_draft,
+}
@@ -0,0 +1,24 @@
+import text_layout
+from pdf_layout import build_layout
+from pdf_render import render_pdf
+from benchmarks import measure
+from benchmarks.drafts import DRAFTS
+
+
+def run(runs):
+    results = []
+    for name, make in DRAFTS.items():
+        data = make()
+
+        def layout():
+            text_layout.clear_caches(words=False)
+            build_layout(data)
+
+        def render():
+            text_layout.clear_caches(words=False)
+            return render_pdf(data)
+
+        results.append({"benchmark": f"build_layout/{name}", **measure(layout, runs)})
+        results.append({"benchmark": f"render_pdf/{name}", **measure(render, runs),
+                        "pdf_bytes": len(render())})
+    return results
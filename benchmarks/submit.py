@@ -0,0 +1,20 @@
+from benchmarks import measure
+from benchmarks.drafts import DRAFTS
+
+
+def run(runs):
+    # __main__ disables the render cache and the render pool before the app is
+    # imported, so every request below does the full render in this process.
+    from strat_app import app
+    client = app.test_client()
+    results = []
+    for name, make in DRAFTS.items():
+        form = {**make(), "action": "submit", "draft_name": f"bench-{name}"}
+
+        def submit():
+            response = client.post("/submit", data=form)
+            assert response.status_code == 200, response.status_code
+            response.close()
+
+        results.append({"benchmark": f"submit/{name}", **measure(submit, runs)})
+    return results
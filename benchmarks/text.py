@@ -0,0 +1,42 @@
+import io
+
+from reportlab.pdfgen import canvas
+
+import text_layout
+from pdf_render import draw_wrapped_text, get_text_height
+from benchmarks import measure
+from benchmarks.drafts import DRAFTS
+
+COLUMN_WIDTH = 500
+
+
+def _clear_caches():
+    text_layout.clear_caches()
+
+
+def run(runs):
+    p = canvas.Canvas(io.BytesIO())
+    results = []
+    for name, make in DRAFTS.items():
+        texts = [value for value in make().values() if value]
+
+        def draw():
+            for text in texts:
+                draw_wrapped_text(p, 50, 700, text, COLUMN_WIDTH, "Helvetica", 10)
+
+        def height():
+            for text in texts:
+                get_text_height(text, COLUMN_WIDTH)
+
+        def cold(func):
+            # Both wrappers memoize; cold runs measure the first wrap of each text.
+            def call():
+                _clear_caches()
+                func()
+            return call
+
+        results.append({"benchmark": f"draw_wrapped_text/{name}/cold", **measure(cold(draw), runs)})
+        results.append({"benchmark": f"draw_wrapped_text/{name}/warm", **measure(draw, runs)})
+        results.append({"benchmark": f"get_text_height/{name}/cold", **measure(cold(height), runs)})
+        results.append({"benchmark": f"get_text_height/{name}/warm", **measure(height, runs)})
+    return results
@@ -0,0 +1,67 @@
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Bulk export of all of a user's drafts ---
+BULK_EXPORT_PARALLEL = int(os.environ.get("BULK_EXPORT_PARALLEL", 4))
+
+
+def render_in_order(drafts, render, parallel=BULK_EXPORT_PARALLEL):
+    # Yields (name, pdf_bytes) in the order given while keeping at most
+    # `parallel` renders in flight, so finished PDFs never pile up in memory
+    # faster than the response is sent.
+    with ThreadPoolExecutor(max_workers=max(parallel, 1), thread_name_prefix="bulk-export") as executor:
+        pending = deque()
+        drafts = iter(drafts)
+        for name, data in drafts:
+            pending.append((name, executor.submit(render, data)))
+            if len(pending) >= parallel:
+                break
+        while pending:
+            name, future = pending.popleft()
+            for next_name, next_data in drafts:
+                pending.append((next_name, executor.submit(render, next_data)))
+                break
+            yield name, future.result()
+
+
+def pdf_filename(name, used):
+    base = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", name).strip(" .") or "Strategic_Topic_Summary"
+    filename = f"{base}.pdf"
+    n = 1
+    while filename in used:
+        n += 1
+        filename = f"{base} ({n}).pdf"
+    used.add(filename)
+    return filename
+
+
+class _ChunkWriter:
+    # Write-only sink for ZipFile. It has no seek(), so zipfile writes data
+    # descriptors after each member instead of rewinding to patch headers.
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(named_pdfs):
+    sink = _ChunkWriter()
+    used = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, pdf_bytes in named_pdfs:
+            zf.writestr(pdf_filename(name, used), pdf_bytes)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,60 @@
+import gzip
+import os
+
+# --- Response compression ---
+# Text responses (the form page, JSON) are compressed with the best encoding
+# the client accepts. PDFs are not: their page streams are already Flate
+# compressed by reportlab (PDF_PAGE_COMPRESSION), and ZIPs are compressed too.
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 500))  # bytes; smaller bodies are sent as is
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))  # 11 is too slow per request
+COMPRESSIBLE_TYPES = ("text/html", "text/css", "text/plain", "application/json", "application/javascript")
+
+_brotli = None
+
+
+def _brotli_module():
+    # Imported on first use; without the package only gzip is offered.
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli
+
+
+def choose_encoding(accept_encodings):
+    # accept_encodings: werkzeug's request.accept_encodings.
+    candidates = ["br", "gzip"] if _brotli_module() else ["gzip"]
+    return accept_encodings.best_match(candidates)
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return _brotli_module().compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings):
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The compressed bytes differ, so a strong ETag would be wrong; a weak one
+    # still matches If-None-Match for the uncompressed representation.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# --- Pool settings (per worker process) ---
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))            # seconds to wait for a free connection
+DB_POOL_IDLE_TIMEOUT = float(os.environ.get("DB_POOL_IDLE_TIMEOUT", 300))  # close connections idle longer than this
+DB_POOL_CHECK_AFTER = float(os.environ.get("DB_POOL_CHECK_AFTER", 30))     # ping connections idle longer than this
+
+TRANSACTION_STATUS_IDLE = 0  # psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, dsn, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 idle_timeout=DB_POOL_IDLE_TIMEOUT, check_after=DB_POOL_CHECK_AFTER):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = max(maxconn, 1)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []      # [(conn, last_used)], most recently used last
+        self._in_use = 0
+        self._filled = False
+
+    def _check_fork(self):
+        # A forked worker must never touch the parent's sockets; closing them here
+        # would terminate the parent's sessions, so the old connections are just dropped.
+        if self._pid != os.getpid():
+            self._orphaned = [conn for conn, _ in self._idle]
+            self._reset()
+
+    def _connect(self):
+        import psycopg2  # deferred so importing the app stays cheap
+        return psycopg2.connect(self.dsn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reap(self, now):
+        # Oldest connections sit at the front of the idle list.
+        while self._idle and len(self._idle) + self._in_use > self.minconn:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.pop(0)
+            self._close(conn)
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            c = conn.cursor()
+            c.execute("SELECT 1")
+            c.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        with self._cond:
+            self._check_fork()
+            self._reap(time.monotonic())
+            fill = 0
+            if not self._filled:
+                self._filled = True
+                fill = max(self.minconn - len(self._idle) - self._in_use - 1, 0)
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.maxconn:
+                    conn, last_used = None, None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f"no database connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                self._close(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        for _ in range(fill):
+            try:
+                extra = self._connect()
+            except Exception:
+                break
+            with self._cond:
+                self._idle.insert(0, (extra, time.monotonic()))
+        return conn
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+            if not discard and not conn.closed:
+                try:
+                    if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except Exception:
+                    discard = True
+            if discard or conn.closed:
+                self._close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._check_fork()
+            for conn, _ in self._idle:
+                self._close(conn)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            return {"idle": len(self._idle), "in_use": self._in_use, "max": self.maxconn}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pool_metrics():
+    if _pool is None:
+        return []
+    stats = _pool.stats()
+    return [("db_pool_connections", "gauge", "Database connections in this worker's pool.", {"state": state}, stats[state])
+            for state in ("idle", "in_use")]
+
+
+metrics.register_collector(_pool_metrics)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(os.environ.get("DATABASE_URL"))
+    return _pool
+
+
+@contextmanager
+def db_connection():
+    pool = get_pool()
+    with metrics.span("db.connect"):
+        conn = pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        pool.putconn(conn, discard=conn.closed != 0)
+        raise
+    pool.putconn(conn)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import threading
+
+from draft_listing import version_text
+from render_cache import DiskCache, MemoryCache, NullCache
+
+# --- Parsed draft cache settings ---
+# Drafts are read far more often than they are written, so the form page keeps
+# parsed drafts keyed by (user_id, name) and stamped with the row's updated_at.
+# The page already reads that timestamp for its ETag, so an entry is only
+# served while it matches the row; a save from another worker changes the
+# timestamp and the stale entry simply misses.
+DRAFT_CACHE_BACKEND = os.environ.get("DRAFT_CACHE_BACKEND", "memory")  # memory, disk or none
+DRAFT_CACHE_MAX_BYTES = int(os.environ.get("DRAFT_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+DRAFT_CACHE_DIR = os.environ.get("DRAFT_CACHE_DIR", "draft_cache")  # disk: shared by the workers on a host
+
+
+def _key(user_id, name):
+    return hashlib.sha256(json.dumps([user_id, name]).encode("utf-8")).hexdigest()
+
+
+class DraftCache:
+    def __init__(self, backend):
+        self.backend = backend
+        # The memory backend holds (updated_at, content, size) tuples, so hits
+        # skip json.loads; the disk backend holds the JSON document.
+        self.parsed = isinstance(backend, MemoryCache)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        if DRAFT_CACHE_BACKEND == "disk":
+            backend = DiskCache(DRAFT_CACHE_DIR, DRAFT_CACHE_MAX_BYTES, suffix=".json")
+        elif DRAFT_CACHE_BACKEND == "memory":
+            backend = MemoryCache(DRAFT_CACHE_MAX_BYTES, sizeof=lambda entry: entry[2])
+        else:
+            backend = NullCache()
+        return cls(backend)
+
+    def _lookup(self, user_id, name, updated_at):
+        entry = self.backend.get(_key(user_id, name))
+        if entry is None:
+            return None
+        if self.parsed:
+            stamp, content, _ = entry
+        else:
+            document = json.loads(entry)
+            stamp, content = document["updated_at"], document["content"]
+        return content if stamp == version_text(updated_at) else None
+
+    def get(self, user_id, name, updated_at):
+        # The draft as of updated_at, or None. Callers get a copy they may modify.
+        content = self._lookup(user_id, name, updated_at)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dict(content) if content is not None else None
+
+    def put(self, user_id, name, updated_at, content):
+        if updated_at is None:
+            return
+        # The encoded size doubles as the memory backend's size estimate.
+        encoded = json.dumps({"updated_at": version_text(updated_at), "content": content}).encode("utf-8")
+        if self.parsed:
+            self.backend.put(_key(user_id, name), (version_text(updated_at), dict(content), len(encoded)))
+        else:
+            self.backend.put(_key(user_id, name), encoded)
+
+    def invalidate(self, user_id, name):
+        self.backend.delete(_key(user_id, name))
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "bytes": getattr(self.backend, "size", 0)}
@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime, timezone
+
+# --- Paged draft listing ---
+# Most recently updated first, paged by keyset on (updated_at, id) so page N
+# costs the same as page 1. The cursor is opaque to clients. The query is
+# covered by drafts_user_updated_idx (schema migration 6).
+DRAFT_LIST_PAGE_SIZE = 50
+DRAFT_LIST_MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(updated_at, draft_id):
+    return base64.urlsafe_b64encode(f"{updated_at.isoformat()}|{draft_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    # Raises ValueError for anything encode_cursor did not produce.
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, draft_id = raw.split("|")
+        return datetime.fromisoformat(updated_at), int(draft_id)
+    except (UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+FIRST_PAGE_SQL = """
+    SELECT id, name, topic, updated_at FROM drafts
+    WHERE user_id = %s
+    ORDER BY updated_at DESC, id DESC
+    LIMIT %s
+"""
+
+NEXT_PAGE_SQL = """
+    SELECT id, name, topic, updated_at FROM drafts
+    WHERE user_id = %s AND (updated_at, id) < (%s, %s)
+    ORDER BY updated_at DESC, id DESC
+    LIMIT %s
+"""
+
+# Every save bumps updated_at and every delete changes the count, so this
+# changes whenever the listing or the named draft does. Timestamps come back
+# timezone-aware.
+LIST_VERSION_SQL = """
+    SELECT count(*),
+           max(updated_at) AT TIME ZONE current_setting('TimeZone'),
+           max(updated_at) FILTER (WHERE name = %s) AT TIME ZONE current_setting('TimeZone')
+    FROM drafts WHERE user_id = %s
+"""
+
+
+def version_text(value):
+    # A list_version() value as text that does not depend on the driver:
+    # psycopg2 returns the timestamptz in the session's zone, asyncpg in UTC.
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return str(value)
+
+
+def page_query(user_id, after, limit):
+    # (sql, params, limit) for one page; shared with the asyncpg helpers.
+    limit = min(max(limit, 1), DRAFT_LIST_MAX_PAGE_SIZE)
+    if after is None:
+        return FIRST_PAGE_SQL, (user_id, limit + 1), limit
+    updated_at, draft_id = decode_cursor(after)
+    return NEXT_PAGE_SQL, (user_id, updated_at, draft_id, limit + 1), limit
+
+
+def list_page(conn, user_id, after=None, limit=DRAFT_LIST_PAGE_SIZE):
+    # Returns ([{name, topic, updated_at}], next_cursor or None).
+    sql, params, limit = page_query(user_id, after, limit)
+    c = conn.cursor()
+    c.execute(sql, params)
+    return page_result(c.fetchall(), limit)
+
+
+def page_result(rows, limit):
+    # One extra row tells us whether another page exists.
+    next_cursor = encode_cursor(rows[limit - 1][3], rows[limit - 1][0]) if len(rows) > limit else None
+    return [
+        {"name": name, "topic": topic, "updated_at": updated_at.isoformat()}
+        for _, name, topic, updated_at in rows[:limit]
+    ], next_cursor
+
+
+def list_version(conn, user_id, name=None):
+    # (draft count, last update of any draft, last update of draft `name`).
+    c = conn.cursor()
+    c.execute(LIST_VERSION_SQL, (name, user_id))
+    return c.fetchone()
@@ -0,0 +1,51 @@
+# --- Full-text search over a user's drafts ---
+# drafts.search_vector is a stored generated column (schema migration 5), so
+# Postgres keeps it current on every save and the GIN index serves lookups.
+# Weights: A = topic and draft name, B = people, recommendation and decision,
+# C = problem and outcome, D = the options table.
+SEARCH_MAX_PER_PAGE = 50
+
+# Rank and count in the inner query; build snippets only for the rows on this page.
+SEARCH_SQL = """
+    SELECT hit.name, hit.topic, hit.updated_at, hit.rank, hit.total,
+           ts_headline('english',
+                       coalesce(hit.content->>'Problem', '') || ' ' || coalesce(hit.content->>'Outcome', ''),
+                       hit.query, 'MaxFragments=1, MaxWords=20, MinWords=8')
+    FROM (
+        SELECT d.name, d.content->>'Topic' AS topic, d.updated_at, d.content, q.query,
+               ts_rank_cd(d.search_vector, q.query) AS rank,
+               count(*) OVER () AS total
+        FROM drafts d, websearch_to_tsquery('english', %s) AS q(query)
+        WHERE d.user_id = %s AND d.search_vector @@ q.query
+        ORDER BY rank DESC, d.updated_at DESC, d.id DESC
+        LIMIT %s OFFSET %s
+    ) hit
+    ORDER BY hit.rank DESC, hit.updated_at DESC
+"""
+
+
+def search_query(user_id, query, page, per_page):
+    # (params, page, per_page) for SEARCH_SQL; shared with the asyncpg helpers.
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), SEARCH_MAX_PER_PAGE)
+    return (query, user_id, per_page, (page - 1) * per_page), page, per_page
+
+
+def search_drafts(conn, user_id, query, page=1, per_page=20):
+    params, page, per_page = search_query(user_id, query, page, per_page)
+    c = conn.cursor()
+    c.execute(SEARCH_SQL, params)
+    return search_result(c.fetchall(), query, page, per_page)
+
+
+def search_result(rows, query, page, per_page):
+    return {
+        "query": query,
+        "page": page,
+        "per_page": per_page,
+        "total": rows[0][4] if rows else 0,
+        "results": [
+            {"name": name, "topic": topic, "updated_at": updated_at.isoformat(), "rank": rank, "snippet": snippet}
+            for name, topic, updated_at, rank, _, snippet in rows
+        ],
+    }
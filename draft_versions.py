@@ -0,0 +1,109 @@
+import json
+import os
+
+# --- Draft history stored as deltas ---
+# Every save that changes something appends a draft_versions row. Most rows
+# hold only the fields that changed; every DRAFT_SNAPSHOT_EVERY-th version
+# holds the full content, so rebuilding any version reads at most that many
+# rows no matter how long the history is. Saves only ever merge fields (see
+# save_fields), so a delta is simply the changed {field: value} pairs.
+DRAFT_SNAPSHOT_EVERY = int(os.environ.get("DRAFT_SNAPSHOT_EVERY", 20))
+
+
+def compute_delta(old, fields):
+    return {key: value for key, value in fields.items() if old.get(key) != value}
+
+
+def is_snapshot(version):
+    return version == 1 or version % DRAFT_SNAPSHOT_EVERY == 0
+
+
+def save_fields(conn, user_id, name, fields):
+    # Merge `fields` into a draft and record the change. Returns the new
+    # version number, or None when nothing changed (nothing is written).
+    c = conn.cursor()
+    c.execute("""
+        SELECT d.id, d.content,
+               (SELECT COALESCE(MAX(v.version), 0) FROM draft_versions v WHERE v.draft_id = d.id)
+        FROM drafts d WHERE d.name = %s AND d.user_id = %s
+        FOR UPDATE
+    """, (name, user_id))
+    row = c.fetchone()
+
+    if row is None:
+        c.execute("""
+            INSERT INTO drafts (name, content, user_id) VALUES (%s, %s::jsonb, %s)
+            ON CONFLICT (name, user_id) DO NOTHING
+            RETURNING id, content
+        """, (name, json.dumps(fields), user_id))
+        inserted = c.fetchone()
+        if inserted is None:
+            # Created concurrently; merge into that row instead.
+            return save_fields(conn, user_id, name, fields)
+        draft_id, content = inserted
+        c.execute("INSERT INTO draft_versions (draft_id, version, snapshot, content) VALUES (%s, 1, TRUE, %s::jsonb)",
+                  (draft_id, json.dumps(content)))
+        return 1
+
+    draft_id, content, last_version = row
+    delta = compute_delta(content, fields)
+    if not delta:
+        return None
+    version = last_version + 1
+    snapshot = is_snapshot(version)
+    c.execute("""
+        WITH updated AS (
+            UPDATE drafts SET content = content || %s::jsonb, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING id, content
+        )
+        INSERT INTO draft_versions (draft_id, version, snapshot, content)
+        SELECT id, %s, %s, CASE WHEN %s THEN content ELSE %s::jsonb END FROM updated
+    """, (json.dumps(delta), draft_id, version, snapshot, snapshot, json.dumps(delta)))
+    return version
+
+
+def list_versions(conn, user_id, name, limit=50):
+    c = conn.cursor()
+    c.execute("""
+        SELECT v.version, v.created_at, v.snapshot,
+               CASE WHEN v.snapshot THEN NULL ELSE ARRAY(SELECT jsonb_object_keys(v.content)) END
+        FROM draft_versions v JOIN drafts d ON d.id = v.draft_id
+        WHERE d.name = %s AND d.user_id = %s
+        ORDER BY v.version DESC
+        LIMIT %s
+    """, (name, user_id, limit))
+    return [
+        {"version": version, "created_at": created_at.isoformat(), "snapshot": snapshot, "changed_fields": changed}
+        for version, created_at, snapshot, changed in c.fetchall()
+    ]
+
+
+# Nearest snapshot at or below the version, then the deltas after it. Plain
+# SQL, so the SQLite backend runs it too.
+LOAD_VERSION_SQL = """
+    WITH draft AS (SELECT id FROM drafts WHERE name = %s AND user_id = %s),
+    base AS (
+        SELECT MAX(v.version) AS version FROM draft_versions v, draft
+        WHERE v.draft_id = draft.id AND v.snapshot AND v.version <= %s
+    )
+    SELECT v.version, v.content FROM draft_versions v, draft, base
+    WHERE v.draft_id = draft.id AND v.version BETWEEN base.version AND %s
+    ORDER BY v.version
+"""
+
+
+def load_version(conn, user_id, name, version):
+    c = conn.cursor()
+    c.execute(LOAD_VERSION_SQL, (name, user_id, version, version))
+    return rebuild(c.fetchall(), version)
+
+
+def rebuild(rows, version):
+    # rows: [(version, content)] from LOAD_VERSION_SQL, oldest first.
+    if not rows or rows[-1][0] != version:
+        return None
+    content = {}
+    for _, part in rows:
+        content.update(part)
+    return content
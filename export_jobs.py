@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from render_service import RENDER_TIMEOUT
+
+# --- Background PDF export jobs ---
+# Job state lives in a small SQLite table shared by all workers on the host
+# (a local stand-in for a broker); finished PDFs are written next to it so
+# downloads can be streamed from disk by any worker.
+EXPORT_ASYNC = os.environ.get("PDF_EXPORT_ASYNC", "0") == "1"
+EXPORT_WORKERS = int(os.environ.get("PDF_EXPORT_WORKERS", 2))
+EXPORT_JOBS_DB = os.environ.get("PDF_EXPORT_JOBS_DB", "export_jobs.db")
+EXPORT_JOBS_DIR = os.environ.get("PDF_EXPORT_JOBS_DIR", "export_jobs")
+EXPORT_JOB_TTL = float(os.environ.get("PDF_EXPORT_JOB_TTL", 3600))  # seconds a finished job and its PDF are kept
+# A running job is reported failed once it has run this long, and a queued or
+# running job as soon as the worker process that owns it has exited.
+EXPORT_JOB_TIMEOUT = float(os.environ.get("PDF_EXPORT_JOB_TIMEOUT", RENDER_TIMEOUT + 10))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_schema_ready = False
+
+
+def _connect():
+    global _schema_ready
+    conn = sqlite3.connect(EXPORT_JOBS_DB, timeout=10, isolation_level=None)
+    if not _schema_ready:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS export_jobs (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        # Columns added after the table was first shipped.
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(export_jobs)")}
+        for column in ("pid INTEGER", "started_at REAL"):
+            if column.split()[0] not in columns:
+                conn.execute(f"ALTER TABLE export_jobs ADD COLUMN {column}")
+        conn.execute("CREATE INDEX IF NOT EXISTS export_jobs_created_at ON export_jobs(created_at)")
+        os.makedirs(EXPORT_JOBS_DIR, exist_ok=True)
+        _schema_ready = True
+    return conn
+
+
+def _get_executor():
+    # Threads do not survive a fork, so each gunicorn worker starts its own pool.
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="pdf-export")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def pdf_path(job_id):
+    return os.path.abspath(os.path.join(EXPORT_JOBS_DIR, f"{job_id}.pdf"))
+
+
+def _set_status(job_id, status, error=None):
+    # A job already reported failed (see _fail_stale) keeps that status.
+    conn = _connect()
+    try:
+        now = time.time()
+        conn.execute("""
+            UPDATE export_jobs SET status = ?, error = ?, finished_at = ?,
+                                   started_at = COALESCE(started_at, ?)
+            WHERE id = ? AND status IN (?, ?)
+        """, (status, error, now if status in (DONE, FAILED) else None, now, job_id, QUEUED, RUNNING))
+    finally:
+        conn.close()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _fail_stale(conn, now):
+    # Jobs whose worker died (restart, max_requests recycle, OOM) or whose
+    # render overran would otherwise stay queued/running until purged.
+    unfinished = conn.execute("SELECT id, status, pid, started_at FROM export_jobs WHERE status IN (?, ?)",
+                              (QUEUED, RUNNING)).fetchall()
+    for job_id, status, pid, started_at in unfinished:
+        if pid is not None and not _alive(pid):
+            error = "the export worker exited before the job finished"
+        elif status == RUNNING and started_at is not None and now - started_at > EXPORT_JOB_TIMEOUT:
+            error = f"the export did not finish within {EXPORT_JOB_TIMEOUT:g} seconds"
+        else:
+            continue
+        conn.execute("UPDATE export_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                     (FAILED, error, now, job_id, status))
+
+
+def _run(job_id, data, render):
+    _set_status(job_id, RUNNING)
+    try:
+        pdf_bytes = render(data)
+        tmp_path = pdf_path(job_id) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, pdf_path(job_id))
+    except Exception as e:
+        _set_status(job_id, FAILED, f"{type(e).__name__}: {e}")
+        return
+    _set_status(job_id, DONE)
+
+
+def purge_expired(now=None):
+    now = now or time.time()
+    conn = _connect()
+    try:
+        _fail_stale(conn, now)
+        # Only finished jobs; a job still rendering keeps its row and file.
+        expired = [row[0] for row in conn.execute(
+            "SELECT id FROM export_jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (DONE, FAILED, now - EXPORT_JOB_TTL),
+        )]
+        for job_id in expired:
+            try:
+                os.remove(pdf_path(job_id))
+            except FileNotFoundError:
+                pass
+        conn.executemany("DELETE FROM export_jobs WHERE id = ?", [(job_id,) for job_id in expired])
+    finally:
+        conn.close()
+
+
+def submit_job(user_id, data, filename, render):
+    job_id = uuid.uuid4().hex
+    purge_expired()
+    conn = _connect()
+    try:
+        conn.execute("INSERT INTO export_jobs (id, user_id, status, filename, created_at, pid) VALUES (?, ?, ?, ?, ?, ?)",
+                     (job_id, user_id, QUEUED, filename, time.time(), os.getpid()))
+    finally:
+        conn.close()
+    _get_executor().submit(_run, job_id, data, render)
+    return job_id
+
+
+def get_job(job_id, user_id):
+    conn = _connect()
+    try:
+        _fail_stale(conn, time.time())
+        row = conn.execute(
+            "SELECT id, status, filename, error, created_at, finished_at FROM export_jobs WHERE id = ? AND user_id = ?",
+            (job_id, user_id)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return dict(zip(("id", "status", "filename", "error", "created_at", "finished_at"), row))
@@ -0,0 +1,22 @@
+import os
+
+# gunicorn picks this file up automatically from the working directory.
+
+
+def on_starting(server):
+    # Opt-in work done once in the master before any worker boots.
+    if os.environ.get("MIGRATE_ON_START") == "1":
+        import storage
+        store = storage.from_env()
+        store.migrate(log=server.log.info)
+        # Workers open their own connections; keep none open in the master.
+        store.close()
+    if os.environ.get("PDF_PRELOAD") == "1":
+        import render_service
+        render_service.preload()
+
+
+def post_fork(server, worker):
+    # Start the PDF render processes as each worker boots, not on its first export.
+    import render_service
+    render_service.start()
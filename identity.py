@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- Cookie UUID -> users.id cache (per worker process) ---
+USER_ID_CACHE_TTL = float(os.environ.get("USER_ID_CACHE_TTL", 60))
+USER_ID_CACHE_SIZE = int(os.environ.get("USER_ID_CACHE_SIZE", 10000))
+
+_cache = OrderedDict()  # cookie -> (users.id, expires_at)
+_cache_lock = threading.Lock()
+
+
+def cached_user_id(cookie_id):
+    with _cache_lock:
+        entry = _cache.get(cookie_id)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del _cache[cookie_id]
+            return None
+        _cache.move_to_end(cookie_id)
+        return entry[0]
+
+
+def remember_user_id(cookie_id, db_user_id):
+    if USER_ID_CACHE_TTL <= 0:
+        return
+    with _cache_lock:
+        _cache[cookie_id] = (db_user_id, time.monotonic() + USER_ID_CACHE_TTL)
+        _cache.move_to_end(cookie_id)
+        while len(_cache) > USER_ID_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def forget_user(cookie_id):
+    with _cache_lock:
+        _cache.pop(cookie_id, None)
+
+
+# Postgres: anonymous cookie users are stored with a NULL password_hash, so
+# creating one costs no KDF work. Insert-or-fetch in one round trip: the SELECT
+# branch sees the snapshot from before the INSERT, so exactly one branch
+# returns the row.
+UPSERT_USER_SQL = """
+    WITH inserted AS (
+        INSERT INTO users (email) VALUES (%s)
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id
+    )
+    SELECT id FROM inserted
+    UNION ALL
+    SELECT id FROM users WHERE email = %s
+    LIMIT 1
+"""
+
+
+def resolve_user_id(cookie_id, upsert):
+    # upsert(cookie_id) -> users.id, from the storage backend; only called on a cache miss.
+    db_user_id = cached_user_id(cookie_id)
+    if db_user_id is None:
+        db_user_id = upsert(cookie_id)
+        remember_user_id(cookie_id, db_user_id)
+    return db_user_id
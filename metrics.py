@@ -0,0 +1,159 @@
+import bisect
+import os
+import threading
+import time
+from functools import wraps
+
+# --- Request and render instrumentation ---
+# Named spans feed a latency histogram and counters track saves, exports and
+# cache hits; /metrics serves them in the Prometheus text format. With
+# METRICS_ENABLED unset every call returns immediately, so the hooks can stay
+# on hot paths. Each gunicorn worker keeps its own numbers: scrape the workers
+# individually or read them as samples of the whole.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_help = {}        # name -> (type, help)
+_collectors = []  # callables returning [(name, type, help, labels, value)] at scrape time
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def describe(name, kind, help_text):
+    _help[name] = (kind, help_text)
+
+
+def inc(name, value=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        row = _histograms.get(key)
+        if row is None:
+            row = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        row[index] += 1
+        row[-1] += seconds
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe("span_duration_seconds", time.perf_counter() - self.start, span=self.name)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    # with metrics.span("pdf.layout"): ...
+    return _Span(name) if METRICS_ENABLED else _NO_SPAN
+
+
+def timed(name):
+    # Decorator form of span().
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def register_collector(collect):
+    # collect() -> [(name, type, help, labels, value)], called on every scrape.
+    _collectors.append(collect)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_text():
+    lines = []
+    seen = set()
+
+    def header(name, kind, help_text=None):
+        if name in seen:
+            return
+        seen.add(name)
+        kind, help_text = _help.get(name, (kind, help_text))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(row)) for key, row in _histograms.items())
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), row in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), row[:-1]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {row[-1]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    for collect in _collectors:
+        for name, kind, help_text, labels, value in collect():
+            header(name, kind, help_text)
+            lines.append(f"{name}{_format_labels(_labels(labels))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+describe("span_duration_seconds", "histogram", "Time spent in a named stage of a request or render.")
+describe("http_request_duration_seconds", "histogram", "Request latency by endpoint.")
+describe("drafts_saved_total", "counter", "Drafts written, including batched autosaves.")
+describe("drafts_deleted_total", "counter", "Drafts deleted.")
+describe("pdf_exports_total", "counter", "PDF exports served, by kind.")
+describe("pdf_render_errors_total", "counter", "Renders that timed out or found the render pool unavailable.")
@@ -0,0 +1,60 @@
+import hashlib
+import os
+import threading
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+
+# --- Static images for the PDF ---
+# Images are decoded once per process, scaled down to the size they are
+# drawn at, and kept as ImageReader objects. fingerprint() is part of the
+# render cache version (strat_app.PDF_CACHE_VERSION), so replacing an image
+# and restarting invalidates cached PDFs and their ETags.
+STATIC_DIR = "static"
+PDF_IMAGE_DPI = int(os.environ.get("PDF_IMAGE_DPI", 300))
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+
+_images = {}  # (name, width, height) -> reader, or None for a missing file
+_lock = threading.Lock()
+
+
+def _load(path, width, height):
+    with PILImage.open(path) as im:
+        im.load()
+        # Keep enough pixels for PDF_IMAGE_DPI at the drawn size (in points).
+        max_px = (max(int(width * PDF_IMAGE_DPI / 72), 1), max(int(height * PDF_IMAGE_DPI / 72), 1))
+        if im.width > max_px[0] or im.height > max_px[1]:
+            im.thumbnail(max_px, PILImage.LANCZOS)
+        reader = ImageReader(im.copy())
+    # Decode to raw RGB now so every document reuses it.
+    reader.getRGBData()
+    return reader
+
+
+def get_image(name, width, height):
+    key = (name, width, height)
+    with _lock:
+        if key in _images:
+            return _images[key]
+
+    path = os.path.join(STATIC_DIR, name)
+    reader = _load(path, width, height) if os.path.exists(path) else None
+    with _lock:
+        _images[key] = reader
+    return reader
+
+
+def fingerprint():
+    # Short hash of the name and bytes of every image under STATIC_DIR.
+    digest = hashlib.sha256()
+    names = sorted(os.listdir(STATIC_DIR)) if os.path.isdir(STATIC_DIR) else []
+    for name in names:
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(STATIC_DIR, name), "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:12]
+
+
+def preload(images):
+    for name, width, height in images:
+        get_image(name, width, height)
@@ -0,0 +1,218 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from reportlab.lib.pagesizes import letter
+
+from text_layout import wrap_text
+
+# --- Layout model ---
+# build_layout() turns form data into pages of positioned items with every
+# text already wrapped into lines. Painting (pdf_render.py) only walks the
+# tree, so each text is wrapped exactly once per document.
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+BOTTOM_MARGIN = 60
+HEADER_COLOR = (0.15, 0.18, 0.25)
+WHITE = (1, 1, 1)
+
+
+@dataclass
+class Text:
+    x: float
+    y: float
+    text: str
+    font_name: str
+    font_size: float
+    color: Optional[Tuple[float, float, float]] = None
+    centered: bool = False
+
+
+@dataclass
+class Lines:
+    x: float
+    y: float
+    lines: Tuple[str, ...]
+    font_name: str = "Helvetica"
+    font_size: float = 10
+    line_height: float = 14
+
+
+@dataclass
+class Box:
+    x: float
+    y: float
+    width: float
+    height: float
+    fill: Optional[Tuple[float, float, float]] = None
+
+
+@dataclass
+class Image:
+    name: str  # file name under static/
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+@dataclass
+class Block:
+    height: float
+    items: list
+    form: Optional[str] = None  # painted once per document as a reusable form XObject
+
+
+@dataclass
+class TableRow:
+    height: float
+    cells: List[Block]
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+
+
+@dataclass
+class Layout:
+    width: float
+    height: float
+    pages: List[Page]
+
+
+def box_height(lines, line_height=14):
+    return line_height * len(lines) + 10
+
+
+class _Flow:
+    def __init__(self, layout):
+        self.layout = layout
+        self.page = None
+        self.y = 0
+        self.new_page(layout.height - 90)
+
+    def new_page(self, y):
+        self.page = Page()
+        self.layout.pages.append(self.page)
+        self.y = y
+
+    def ensure(self, needed):
+        if self.y - needed < BOTTOM_MARGIN:
+            self.new_page(self.layout.height - 50)
+
+    def add(self, item):
+        self.page.items.append(item)
+
+
+def _field_block(flow, label, text, width):
+    lines = wrap_text(text, width - 10)
+    height = box_height(lines)
+    flow.ensure(height)
+    y = flow.y
+    flow.add(Block(height, [
+        Text(50, y, label, "Helvetica-Bold", 12),
+        Box(50, y - height - 5, width, height),
+        Lines(55, y - 20, lines),
+    ]))
+    return height
+
+
+def _header(flow):
+    width, height = flow.layout.width, flow.layout.height
+    flow.add(Block(70, [
+        Box(0, height - 70, width, 70, fill=HEADER_COLOR),
+        Text(50, height - 30, "Turning Point for God", "Helvetica-Bold", 14, color=WHITE),
+        Text(50, height - 50, "Strategic / Ad hoc Topic Summary", "Helvetica-Bold", 16, color=WHITE),
+        Image("overlay_icon.png", width - 70, height - 60, 40, 40),
+    ], form="header"))
+
+
+def _options_table(flow, data):
+    width = flow.layout.width
+    rows = [
+        ("Description", [data.get("Option1Description", ""), data.get("Option2Description", ""), data.get("Option3Description", "")]),
+        ("Pros", [data.get("Option1Pros", ""), data.get("Option2Pros", ""), data.get("Option3Pros", "")]),
+        ("Cons", [data.get("Option1Cons", ""), data.get("Option2Cons", ""), data.get("Option3Cons", "")]),
+        ("Benefits/Revenue", [data.get("Option1Benefits/Revenue", ""), data.get("Option2Benefits/Revenue", ""), data.get("Option3Benefits/Revenue", "")]),
+        ("Obstacles", [data.get("Option1Obstacles", ""), data.get("Option2Obstacles", ""), data.get("Option3Obstacles", "")])
+    ]
+    col_width = (width - 100) / 4
+
+    flow.add(Text(50, flow.y, "Options Table", "Helvetica-Bold", 12))
+    flow.y -= 20
+
+    y = flow.y
+    cells = [Block(20, [Box(50, y - 20, col_width, 20)])]
+    for i, header in enumerate(["Option 1", "Option 2", "Option 3"]):
+        x = 50 + col_width * (i + 1)
+        cells.append(Block(20, [
+            Box(x, y - 20, col_width, 20),
+            Text(x + col_width / 2, y - 15, header, "Helvetica-Bold", 11, centered=True),
+        ]))
+    flow.add(TableRow(20, cells))
+    flow.y -= 30
+
+    for label, options in rows:
+        label_lines = wrap_text(label, col_width - 10, "Helvetica-Bold", 11)
+        option_lines = [wrap_text(txt, col_width - 10) for txt in options]
+        row_h = max(box_height(lines) for lines in option_lines + [label_lines]) + 20
+        flow.ensure(row_h)
+        y = flow.y
+        cells = [Block(row_h, [
+            Box(50, y - row_h, col_width, row_h),
+            Lines(55, y - 20, label_lines, "Helvetica-Bold", 11),
+        ])]
+        for i, lines in enumerate(option_lines):
+            x = 50 + (i + 1) * col_width
+            cells.append(Block(row_h, [
+                Box(x, y - row_h, col_width, row_h),
+                Lines(x + 5, y - 20, lines),
+            ]))
+        flow.add(TableRow(row_h, cells))
+        flow.y -= (row_h + 10)
+        flow.y -= 8
+
+
+def build_layout(data):
+    layout = Layout(PAGE_WIDTH, PAGE_HEIGHT, [])
+    width = layout.width
+    flow = _Flow(layout)
+    _header(flow)
+
+    top_fields = [
+        ("Topic", data.get("Topic", "")),
+        ("Point Person", data.get("PointPerson", "")),
+        ("Role of Executive Team (consult, inform, decide)", data.get("Role", "")),
+        ("Executive Sponsor", data.get("Sponsor", "")),
+        ("Problem Definition", data.get("Problem", "")),
+        ("Outcome Description", data.get("Outcome", "")),
+        ("Primary Recommendation", data.get("Recommendation", ""))
+    ]
+    for label, val in top_fields:
+        height = _field_block(flow, label, val, width - 100)
+        flow.y -= (height + 25)
+
+    # The options table always starts on a fresh page.
+    flow.new_page(layout.height - 90)
+    _options_table(flow, data)
+
+    height = _field_block(flow, "Final Decision", data.get("Decision", ""), width - 100)
+    flow.y -= (height + 15)
+    flow.y -= 20
+
+    flow.add(Text(50, flow.y, "Key Actions: (Who, What, When?)", "Helvetica-Bold", 12))
+    flow.y -= 10
+    for i in range(1, 6):
+        lines = wrap_text(data.get(f"Action{i}", ""), width - 130)
+        height = box_height(lines)
+        flow.ensure(height)
+        y = flow.y
+        flow.add(Block(height, [
+            Text(55, y - 15, f"{i}.", "Helvetica-Bold", 10),
+            Box(75, y - height - 5, width - 120, height),
+            Lines(80, y - 20, lines),
+        ]))
+        flow.y -= (height + 15)
+
+    flow.add(Image("logo.png", 50, 20, 80, 30))
+    return layout
@@ -0,0 +1,112 @@
+import io
+import os
+
+from reportlab.pdfgen import canvas
+
+import metrics
+import pdf_assets
+from pdf_layout import PAGE_HEIGHT, PAGE_WIDTH, Block, Box, Image, Lines, TableRow, Text, box_height, build_layout
+from text_layout import draw_lines, wrap_text
+
+# Flate-compress page content streams: several times smaller for a little CPU.
+PDF_PAGE_COMPRESSION = int(os.environ.get("PDF_PAGE_COMPRESSION", 1))
+
+
+# --- PDF utilities ---
+def draw_wrapped_text(p, x, y, text, max_width, font_name=None, font_size=None, line_height=14):
+    if font_name and font_size:
+        p.setFont(font_name, font_size)
+    else:
+        font_name, font_size = p._fontname, p._fontsize
+    lines = wrap_text(text, max_width, font_name, font_size)
+    return draw_lines(p, x, y, lines, line_height)
+
+def get_text_height(text, max_width, font_name="Helvetica", font_size=10, line_height=14):
+    return box_height(wrap_text(text, max_width, font_name, font_size), line_height)
+
+
+# --- Painter ---
+def paint_item(p, item):
+    if isinstance(item, Block):
+        if item.form:
+            if not p.hasForm(item.form):
+                p.beginForm(item.form)
+                for child in item.items:
+                    paint_item(p, child)
+                p.endForm()
+            p.doForm(item.form)
+            return
+        for child in item.items:
+            paint_item(p, child)
+    elif isinstance(item, TableRow):
+        for cell in item.cells:
+            paint_item(p, cell)
+    elif isinstance(item, Lines):
+        p.setFont(item.font_name, item.font_size)
+        draw_lines(p, item.x, item.y, item.lines, item.line_height)
+    elif isinstance(item, Text):
+        if item.color:
+            p.setFillColorRGB(*item.color)
+        p.setFont(item.font_name, item.font_size)
+        if item.centered:
+            p.drawCentredString(item.x, item.y, item.text)
+        else:
+            p.drawString(item.x, item.y, item.text)
+        if item.color:
+            p.setFillColorRGB(0, 0, 0)
+    elif isinstance(item, Box):
+        if item.fill:
+            p.setFillColorRGB(*item.fill)
+            p.rect(item.x, item.y, item.width, item.height, fill=1, stroke=0)
+            p.setFillColorRGB(0, 0, 0)
+        else:
+            p.rect(item.x, item.y, item.width, item.height, stroke=1, fill=0)
+    elif isinstance(item, Image):
+        image = pdf_assets.get_image(item.name, item.width, item.height)
+        if image is not None:
+            p.drawImage(image, item.x, item.y, width=item.width, height=item.height, mask='auto')
+    else:
+        raise TypeError(f"cannot paint {type(item).__name__}")
+
+
+def paint(layout, p):
+    for i, page in enumerate(layout.pages):
+        if i:
+            p.showPage()
+        for item in page.items:
+            paint_item(p, item)
+
+
+def preload():
+    # Loads reportlab's fonts, the static images and the text caches.
+    render_pdf({})
+
+
+def render_pdf(data):
+    with metrics.span("pdf.layout"):
+        layout = build_layout(data)
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=(layout.width, layout.height), pageCompression=PDF_PAGE_COMPRESSION)
+    with metrics.span("pdf.paint"):
+        paint(layout, p)
+    with metrics.span("pdf.save"):
+        p.save()
+    return buffer.getvalue()
+
+
+def render_merged_pdf(drafts):
+    # drafts: [(name, data)]. Each draft starts on a new page and gets an
+    # outline entry so readers can jump between summaries.
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=PDF_PAGE_COMPRESSION)
+    for i, (name, data) in enumerate(drafts):
+        if i:
+            p.showPage()
+        key = f"draft{i}"
+        p.bookmarkPage(key)
+        p.addOutlineEntry(name, key, level=0)
+        paint(build_layout(data), p)
+    if drafts:
+        p.showOutline()
+    p.save()
+    return buffer.getvalue()
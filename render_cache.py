@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# --- Render cache settings ---
+PDF_CACHE_BACKEND = os.environ.get("PDF_CACHE_BACKEND", "memory")  # memory, disk or none
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", "pdf_cache")
+
+# Form fields that only drive the request, not what ends up in the PDF.
+IGNORED_FIELDS = ("action", "draft_name")
+
+
+def cache_key(data, version):
+    # Every field is drawn through draw_wrapped_text, which splits on
+    # whitespace, so runs of whitespace and empty fields cannot change the PDF.
+    normalized = {}
+    for field, value in data.items():
+        if field in IGNORED_FIELDS:
+            continue
+        value = " ".join(str(value).split())
+        if value:
+            normalized[field] = value
+    payload = json.dumps({"version": version, "data": normalized}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def put(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache:
+    # sizeof(value) -> bytes charged against max_bytes; len suits bytes values.
+    def __init__(self, max_bytes=PDF_CACHE_MAX_BYTES, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        value_size = self.sizeof(value)
+        if value_size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old)
+            self._entries[key] = value
+            self.size += value_size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskCache:
+    # One file per key. Hits refresh the file's mtime, so eviction removes the
+    # least recently used files first. Safe to share between worker processes.
+    def __init__(self, directory=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES, suffix=".pdf"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _scan(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, st.st_size, st.st_mtime))
+        return entries
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.size += len(value)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key):
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.size = max(self.size - size, 0)
+
+    def _evict(self):
+        # Other workers write to the same directory, so re-measure from disk.
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        self.size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._scan():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.size = 0
+
+
+class RenderCache:
+    def __init__(self, backend, version):
+        self.backend = backend
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, version):
+        if PDF_CACHE_BACKEND == "disk":
+            backend = DiskCache()
+        elif PDF_CACHE_BACKEND == "memory":
+            backend = MemoryCache()
+        else:
+            backend = NullCache()
+        return cls(backend, version)
+
+    def get_or_render(self, data, render):
+        key = cache_key(data, self.version)
+        pdf_bytes = self.backend.get(key)
+        with self._lock:
+            if pdf_bytes is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if pdf_bytes is None:
+            pdf_bytes = render(data)
+            self.backend.put(key, pdf_bytes)
+        return pdf_bytes
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "bytes": getattr(self.backend, "size", 0)}
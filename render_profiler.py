@@ -0,0 +1,103 @@
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+
+# --- Opt-in profiling of slow renders ---
+# A render is profiled when the request carries X-Profile-Render with the
+# PDF_PROFILE_TOKEN value, or at random with probability PDF_PROFILE_SAMPLE_RATE.
+# The profile is kept only if the render took longer than PDF_PROFILE_THRESHOLD,
+# and is written with the draft's shape (field lengths, never the text) next to
+# it. Load one with `python -m pstats profiles/<name>.prof`.
+PDF_PROFILE_DIR = os.environ.get("PDF_PROFILE_DIR", "profiles")
+PDF_PROFILE_SAMPLE_RATE = float(os.environ.get("PDF_PROFILE_SAMPLE_RATE", 0))
+PDF_PROFILE_THRESHOLD = float(os.environ.get("PDF_PROFILE_THRESHOLD", 1.0))  # seconds
+PDF_PROFILE_TOKEN = os.environ.get("PDF_PROFILE_TOKEN")  # unset: the header is ignored
+PDF_PROFILE_MAX_FILES = int(os.environ.get("PDF_PROFILE_MAX_FILES", 200))
+PROFILE_HEADER = "X-Profile-Render"
+
+# Python 3.12+ allows one enabled cProfile.Profile per process, so renders
+# running in other threads at the same moment are not profiled.
+_profiling = threading.Lock()
+
+
+def should_profile(headers):
+    if PDF_PROFILE_TOKEN and headers.get(PROFILE_HEADER) == PDF_PROFILE_TOKEN:
+        return True
+    return PDF_PROFILE_SAMPLE_RATE > 0 and random.random() < PDF_PROFILE_SAMPLE_RATE
+
+
+def draft_shape(data):
+    # Field name -> length of its text; enough to rebuild a draft of the same
+    # size with benchmarks.drafts without keeping anyone's content.
+    lengths = {field: len(str(value)) for field, value in data.items() if value}
+    longest_word = max((len(word) for value in data.values() for word in str(value).split()), default=0)
+    return {"fields": lengths, "total_chars": sum(lengths.values()), "longest_word": longest_word}
+
+
+def _shape(func_name, args):
+    if func_name == "render_merged_pdf":
+        return {"drafts": [draft_shape(data) for _, data in args[0]]}
+    return draft_shape(args[0])
+
+
+def _prune(directory):
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[:max(len(profiles) - PDF_PROFILE_MAX_FILES, 0)]:
+        for path in (entry.path, entry.path[:-len(".prof")] + ".json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _save(profile, func_name, args, elapsed, error):
+    os.makedirs(PDF_PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PDF_PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{int(elapsed * 1000)}ms")
+    profile.dump_stats(base + ".prof")
+    with open(base + ".json", "w") as f:
+        json.dump({
+            "render": func_name,
+            "elapsed_s": round(elapsed, 4),
+            "threshold_s": PDF_PROFILE_THRESHOLD,
+            "error": error,
+            "shape": _shape(func_name, args),
+        }, f, indent=2)
+    _prune(PDF_PROFILE_DIR)
+
+
+def call(render_func, args):
+    # Runs render_func(*args) under cProfile. The profile is written even when
+    # the render fails (a timeout is the most interesting case) as long as it
+    # was slow enough.
+    if not _profiling.acquire(blocking=False):
+        return render_func(*args)
+    try:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) holds the hook.
+            return render_func(*args)
+        start = time.perf_counter()
+        error = None
+        try:
+            return render_func(*args)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            if elapsed >= PDF_PROFILE_THRESHOLD:
+                try:
+                    _save(profile, render_func.__name__, args, elapsed, error)
+                except OSError:
+                    pass  # never fail an export because the profile could not be written
+    finally:
+        _profiling.release()
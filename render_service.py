@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+# --- Out-of-process PDF rendering ---
+# reportlab drawing is pure-Python CPU work, so renders run in a pool of
+# worker processes instead of contending for the web worker's GIL.
+# PDF_RENDER_PROCESSES=0 renders inline in the calling thread.
+RENDER_PROCESSES = int(os.environ.get("PDF_RENDER_PROCESSES", 0))
+RENDER_TIMEOUT = float(os.environ.get("PDF_RENDER_TIMEOUT", 30))  # seconds per render
+RENDER_START_METHOD = os.environ.get("PDF_RENDER_START_METHOD", "spawn")
+
+
+class RenderTimeout(Exception):
+    pass
+
+
+class RenderUnavailable(Exception):
+    pass
+
+
+def _warm_worker():
+    # Pay for reportlab imports, font metrics and the image decoders once per
+    # pool process, not on the first request it serves.
+    import pdf_render
+    pdf_render.preload()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _call(render_func, args, profile):
+    if profile:
+        import render_profiler
+        return render_profiler.call(render_func, args)
+    return render_func(*args)
+
+
+def _render_in_worker(func_name, args, timeout, profile=False):
+    import pdf_render
+    render_func = getattr(pdf_render, func_name)
+
+    def on_alarm(signum, frame):
+        raise RenderTimeout(f"PDF render exceeded {timeout}s")
+
+    # Tasks run on the pool process's main thread, so an interval timer can
+    # interrupt a runaway render without taking the whole pool down.
+    if timeout and hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            return _call(render_func, args, profile)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return _call(render_func, args, profile)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Each gunicorn worker owns its pool; a pool inherited across fork is unusable.
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context(RENDER_START_METHOD),
+                initializer=_warm_worker,
+            )
+            _pool_pid = os.getpid()
+            # Start every process now so the first exports don't pay for spawning.
+            for _ in range(RENDER_PROCESSES):
+                _pool.submit(_ping)
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def preload():
+    # Opt-in (PDF_PRELOAD=1): import and warm the PDF engine in the gunicorn
+    # master so forked workers inherit it instead of loading it on first export.
+    import pdf_render
+    pdf_render.preload()
+
+
+def start():
+    if RENDER_PROCESSES > 0:
+        get_pool()
+
+
+def _dispatch(func_name, args, timeout, profile=False):
+    # Stage spans (pdf.layout, pdf.paint, pdf.save) are only recorded for
+    # inline renders; pool workers are separate processes with their own metrics.
+    with metrics.span(f"render.{func_name}"):
+        try:
+            return _dispatch_untimed(func_name, args, timeout, profile)
+        except RenderTimeout:
+            metrics.inc("pdf_render_errors_total", reason="timeout")
+            raise
+        except RenderUnavailable:
+            metrics.inc("pdf_render_errors_total", reason="unavailable")
+            raise
+
+
+def _dispatch_untimed(func_name, args, timeout, profile):
+    # profile=True runs the render under render_profiler wherever it executes.
+    if RENDER_PROCESSES <= 0:
+        import pdf_render
+        return _call(getattr(pdf_render, func_name), args, profile)
+
+    pool = get_pool()
+    try:
+        future = pool.submit(_render_in_worker, func_name, args, timeout, profile)
+    except BrokenProcessPool as e:
+        _discard_pool(pool)
+        raise RenderUnavailable("PDF render pool is broken") from e
+    try:
+        # The worker enforces the timeout itself; the grace period only
+        # covers queueing behind other renders and returning the bytes.
+        return future.result(timeout=timeout * 2 if timeout else None)
+    except FutureTimeout as e:
+        future.cancel()
+        raise RenderTimeout(f"PDF render did not finish within {timeout * 2}s") from e
+    except BrokenProcessPool as e:
+        _discard_pool(pool)
+        raise RenderUnavailable("PDF render process died") from e
+
+
+def render(data, timeout=RENDER_TIMEOUT, profile=False):
+    return _dispatch("render_pdf", (data,), timeout, profile)
+
+
+def render_merged(drafts, timeout=RENDER_TIMEOUT, profile=False):
+    # One document for all drafts, so the whole merge runs in a single process.
+    return _dispatch("render_merged_pdf", (drafts,), timeout * max(len(drafts), 1) if timeout else None, profile)
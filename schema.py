@@ -0,0 +1,221 @@
+from db import db_connection
+
+OPTION_FIELDS = [f"Option{i}{field}" for i in (1, 2, 3)
+                 for field in ("Description", "Pros", "Cons", "Benefits/Revenue", "Obstacles")]
+
+
+def _text_fields(*fields):
+    # Generated columns must be immutable, which rules out concat_ws().
+    return " || ' ' || ".join(f"coalesce(content->>'{field}', '')" for field in fields)
+
+
+# --- Versioned schema migrations ---
+# Applied by `flask --app strat_app init-db` once per deploy (or by the
+# gunicorn master when MIGRATE_ON_START=1), never at import time. Append new
+# migrations to the end; never edit one that has shipped. Each runs in its
+# own transaction together with its schema_version row.
+MIGRATIONS = [
+    (1, "users and drafts tables", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS drafts (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(name, user_id)
+        )
+        """,
+    ]),
+    (2, "anonymous users have no password hash", [
+        "ALTER TABLE users ALTER COLUMN password_hash DROP NOT NULL",
+    ]),
+    (3, "draft content stored as JSONB", [
+        "ALTER TABLE drafts ALTER COLUMN content TYPE JSONB USING content::jsonb",
+    ]),
+    (4, "draft history as snapshots and deltas", [
+        """
+        CREATE TABLE draft_versions (
+            draft_id INTEGER NOT NULL REFERENCES drafts(id) ON DELETE CASCADE,
+            version INTEGER NOT NULL,
+            snapshot BOOLEAN NOT NULL,
+            content JSONB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (draft_id, version)
+        )
+        """,
+    ]),
+    (5, "full-text search over draft content", [
+        f"""
+        ALTER TABLE drafts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', {_text_fields("Topic")} || ' ' || name), 'A') ||
+            setweight(to_tsvector('english', {_text_fields("PointPerson", "Sponsor", "Recommendation", "Decision")}), 'B') ||
+            setweight(to_tsvector('english', {_text_fields("Problem", "Outcome")}), 'C') ||
+            setweight(to_tsvector('english', {_text_fields(*OPTION_FIELDS)}), 'D')
+        ) STORED
+        """,
+        "CREATE INDEX drafts_search_idx ON drafts USING GIN (search_vector)",
+    ]),
+    (6, "draft listing ordered by last update", [
+        "UPDATE drafts SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL",
+        "ALTER TABLE drafts ALTER COLUMN updated_at SET NOT NULL",
+        "ALTER TABLE drafts ADD COLUMN topic TEXT GENERATED ALWAYS AS (content->>'Topic') STORED",
+        # Covers the listing query, so a page is read from the index alone.
+        "CREATE INDEX drafts_user_updated_idx ON drafts (user_id, updated_at DESC, id DESC) INCLUDE (name, topic)",
+    ]),
+]
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent deploys migrate one at a time.
+MIGRATION_LOCK_ID = 7245100311
+
+
+def current_version(conn):
+    c = conn.cursor()
+    c.execute("SELECT to_regclass('schema_version')")
+    if c.fetchone()[0] is None:
+        return 0
+    c.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return c.fetchone()[0]
+
+
+def migrate(log=print):
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+        applied = []
+        for version, description, statements in MIGRATIONS:
+            # Re-take the lock for every transaction; it is released on commit.
+            c.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            for statement in statements:
+                c.execute(statement)
+            c.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                      (version, description))
+            conn.commit()
+            log(f"Applied migration {version}: {description}")
+            applied.append(version)
+        if not applied:
+            log(f"Schema is up to date (version {current_version(conn)}).")
+        return applied
+
+
+# --- SQLite schema (STORAGE_BACKEND=sqlite) ---
+# Same tables and the same history model; content is JSON text, timestamps are
+# UTC "YYYY-MM-DD HH:MM:SS.ffffff" text so they sort correctly, and search uses
+# an FTS5 table kept in step with drafts by triggers. Columns mirror the
+# Postgres tsvector weights: heading (A), people (B), body (C), options (D).
+def _sqlite_text(row, *fields):
+    return " || ' ' || ".join(f"""coalesce(json_extract({row}.content, '$."{field}"'), '')""" for field in fields)
+
+
+def _sqlite_fts_insert(row):
+    return f"""
+        INSERT INTO drafts_fts (rowid, heading, people, body, options) VALUES (
+            {row}.id,
+            {_sqlite_text(row, "Topic")} || ' ' || {row}.name,
+            {_sqlite_text(row, "PointPerson", "Sponsor", "Recommendation", "Decision")},
+            {_sqlite_text(row, "Problem", "Outcome")},
+            {_sqlite_text(row, *OPTION_FIELDS)}
+        );
+    """
+
+
+SQLITE_MIGRATIONS = [
+    (1, "users, drafts and draft history", [
+        """
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE drafts (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            content TEXT NOT NULL,
+            topic TEXT GENERATED ALWAYS AS (json_extract(content, '$.Topic')) VIRTUAL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            UNIQUE(name, user_id)
+        )
+        """,
+        # Covers the listing query; id is the rowid and is part of every index.
+        "CREATE INDEX drafts_user_updated_idx ON drafts (user_id, updated_at, name, topic)",
+        """
+        CREATE TABLE draft_versions (
+            draft_id INTEGER NOT NULL REFERENCES drafts(id) ON DELETE CASCADE,
+            version INTEGER NOT NULL,
+            snapshot INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (draft_id, version)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (2, "full-text search over draft content", [
+        "CREATE VIRTUAL TABLE drafts_fts USING fts5(heading, people, body, options, tokenize='porter')",
+        f"CREATE TRIGGER drafts_fts_insert AFTER INSERT ON drafts BEGIN {_sqlite_fts_insert('new')} END",
+        f"""
+        CREATE TRIGGER drafts_fts_update AFTER UPDATE OF name, content ON drafts BEGIN
+            DELETE FROM drafts_fts WHERE rowid = old.id;
+            {_sqlite_fts_insert('new')}
+        END
+        """,
+        "CREATE TRIGGER drafts_fts_delete AFTER DELETE ON drafts BEGIN DELETE FROM drafts_fts WHERE rowid = old.id; END",
+    ]),
+]
+
+
+def migrate_sqlite(conn, log=print):
+    # conn: an autocommit sqlite3 connection. BEGIN IMMEDIATE takes the write
+    # lock, so concurrent processes migrate one at a time.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    applied = []
+    for version, description, statements in SQLITE_MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                conn.execute("ROLLBACK")
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        log(f"Applied migration {version}: {description}")
+        applied.append(version)
+    if not applied:
+        version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+        log(f"Schema is up to date (version {version}).")
+    return applied
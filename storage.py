@@ -0,0 +1,341 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import draft_listing
+import draft_search
+import draft_versions
+import schema
+from db import db_connection, get_pool
+from identity import UPSERT_USER_SQL
+
+# --- Draft storage backends ---
+# strat_app talks to one storage object; STORAGE_BACKEND picks Postgres
+# (DATABASE_URL, the default) or an embedded SQLite file (SQLITE_PATH), which
+# needs no database server. Both keep the same version history and support
+# ranked search, keyset listing and the ETag validators.
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "postgres")  # postgres or sqlite
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "drafts.db")
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", 10))  # seconds to wait for the write lock
+SQLITE_CACHED_STATEMENTS = 256  # prepared statements kept per connection
+
+
+class PostgresStorage:
+    def migrate(self, log=print):
+        return schema.migrate(log)
+
+    def close(self):
+        # Closes this process's idle pooled connections; the pool reconnects on demand.
+        get_pool().closeall()
+
+    def upsert_user(self, cookie_id):
+        with db_connection() as conn:
+            c = conn.cursor()
+            row = None
+            # A concurrent insert of the same cookie can hide the row from both
+            # branches of the CTE; the retry then sees the committed row.
+            for _ in range(2):
+                c.execute(UPSERT_USER_SQL, (cookie_id, cookie_id))
+                row = c.fetchone()
+                conn.commit()
+                if row:
+                    break
+        if row is None:
+            raise RuntimeError(f"could not resolve user for cookie {cookie_id!r}")
+        return row[0]
+
+    def write_drafts(self, rows):
+        # rows: [(user_id, name, fields)], written in one transaction.
+        with db_connection() as conn:
+            for user_id, name, fields in rows:
+                draft_versions.save_fields(conn, user_id, name, fields)
+            conn.commit()
+
+    def load_draft(self, user_id, name, fields=None):
+        # fields: optional list of keys to project server-side instead of the whole draft.
+        with db_connection() as conn:
+            c = conn.cursor()
+            if fields:
+                c.execute("""
+                    SELECT COALESCE(jsonb_object_agg(key, value), '{}'::jsonb)
+                    FROM drafts, jsonb_each(drafts.content)
+                    WHERE name = %s AND user_id = %s AND key = ANY(%s)
+                """, (name, user_id, list(fields)))
+            else:
+                c.execute("SELECT content FROM drafts WHERE name = %s AND user_id = %s", (name, user_id))
+            row = c.fetchone()
+        return row[0] if row else {}
+
+    def list_page(self, user_id, after=None, limit=draft_listing.DRAFT_LIST_PAGE_SIZE):
+        with db_connection() as conn:
+            return draft_listing.list_page(conn, user_id, after, limit)
+
+    def list_version(self, user_id, name=None):
+        with db_connection() as conn:
+            return draft_listing.list_version(conn, user_id, name)
+
+    def load_all_drafts(self, user_id):
+        with db_connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT name, content FROM drafts WHERE user_id = %s ORDER BY name", (user_id,))
+            return c.fetchall()
+
+    def delete_draft(self, user_id, name):
+        with db_connection() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM drafts WHERE name = %s AND user_id = %s", (name, user_id))
+            conn.commit()
+
+    def delete_user(self, user_id):
+        with db_connection() as conn:
+            conn.cursor().execute("DELETE FROM users WHERE id = %s", (user_id,))
+            conn.commit()
+
+    def search_drafts(self, user_id, query, page=1, per_page=20):
+        with db_connection() as conn:
+            return draft_search.search_drafts(conn, user_id, query, page, per_page)
+
+    def list_versions(self, user_id, name, limit=50):
+        with db_connection() as conn:
+            return draft_versions.list_versions(conn, user_id, name, limit)
+
+    def load_version(self, user_id, name, version):
+        with db_connection() as conn:
+            return draft_versions.load_version(conn, user_id, name, version)
+
+
+def _now():
+    return _timestamp(datetime.now(timezone.utc))
+
+
+def _timestamp(value):
+    # Stored form: naive UTC text that sorts like the time it names.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+def _datetime(text):
+    return datetime.fromisoformat(text) if text is not None else None
+
+
+def _utc(text):
+    return _datetime(text).replace(tzinfo=timezone.utc) if text is not None else None
+
+
+def match_expression(query):
+    # websearch_to_tsquery-style input for FTS5: words are ANDed, "quoted
+    # phrases" stay together, `or` joins its neighbours and -term excludes.
+    # Every term is quoted, so user input can never be FTS5 syntax.
+    include, exclude = [], []
+    pending_or = False
+    for negate, phrase, word in re.findall(r'(-?)(?:"([^"]*)"?|(\S+))', query):
+        if not negate and not phrase and word.lower() == "or":
+            pending_or = bool(include)
+            continue
+        terms = re.findall(r"\w+", phrase or word)
+        if not terms:
+            continue
+        term = '"' + " ".join(terms) + '"'
+        if negate:
+            exclude.append(term)
+        elif pending_or:
+            include[-1] = f"{include[-1]} OR {term}"
+            pending_or = False
+        else:
+            include.append(term)
+    if not include:
+        return None
+    expression = " AND ".join(f"({term})" for term in include)
+    for term in exclude:
+        expression = f"({expression}) NOT {term}"
+    return expression
+
+
+class SqliteStorage:
+    # bm25 column weights mirror the Postgres A/B/C/D weights. CROSS JOIN
+    # keeps the MATCH as the outer loop (SQLite otherwise re-runs it per
+    # draft). FTS5 auxiliary functions cannot run under a window function,
+    # so snippets come from a second query for just the page's rows.
+    SEARCH_SQL = """
+        WITH hits AS (
+            SELECT d.id, d.name, d.topic, d.updated_at,
+                   -bm25(drafts_fts, 1.0, 0.4, 0.2, 0.1) AS rank
+            FROM drafts_fts CROSS JOIN drafts d ON d.id = drafts_fts.rowid
+            WHERE drafts_fts MATCH ? AND d.user_id = ?
+        )
+        SELECT *, count(*) OVER () AS total FROM hits
+        ORDER BY rank DESC, updated_at DESC, id DESC
+        LIMIT ? OFFSET ?
+    """
+    SNIPPET_SQL = """
+        SELECT rowid, snippet(drafts_fts, 2, '<b>', '</b>', '...', 20)
+        FROM drafts_fts WHERE drafts_fts MATCH ? AND rowid IN ({})
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        # One connection per thread (sqlite3 connections are not shareable),
+        # reopened after a fork. Autocommit mode: transactions are explicit.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None,
+                                   cached_statements=SQLITE_CACHED_STATEMENTS)
+            # WAL lets readers run alongside the single writer.
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _write(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-then-write
+        # sequences cannot deadlock against another writer.
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def migrate(self, log=print):
+        return schema.migrate_sqlite(self._conn(), log)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def upsert_user(self, cookie_id):
+        with self._write() as conn:
+            conn.execute("INSERT OR IGNORE INTO users (email, created_at) VALUES (?, ?)", (cookie_id, _now()))
+            return conn.execute("SELECT id FROM users WHERE email = ?", (cookie_id,)).fetchone()[0]
+
+    def _save_fields(self, conn, user_id, name, fields):
+        # Same history as draft_versions.save_fields; the write lock is already held.
+        now = _now()
+        row = conn.execute("""
+            SELECT d.id, d.content,
+                   (SELECT COALESCE(MAX(v.version), 0) FROM draft_versions v WHERE v.draft_id = d.id)
+            FROM drafts d WHERE d.name = ? AND d.user_id = ?
+        """, (name, user_id)).fetchone()
+        if row is None:
+            content = json.dumps(fields)
+            draft_id = conn.execute(
+                "INSERT INTO drafts (name, content, user_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (name, content, user_id, now, now),
+            ).lastrowid
+            conn.execute("INSERT INTO draft_versions (draft_id, version, snapshot, content, created_at) "
+                         "VALUES (?, 1, 1, ?, ?)", (draft_id, content, now))
+            return 1
+
+        draft_id, content, last_version = row
+        content = json.loads(content)
+        delta = draft_versions.compute_delta(content, fields)
+        if not delta:
+            return None
+        content.update(delta)
+        version = last_version + 1
+        snapshot = draft_versions.is_snapshot(version)
+        conn.execute("UPDATE drafts SET content = ?, updated_at = ? WHERE id = ?",
+                     (json.dumps(content), now, draft_id))
+        conn.execute("INSERT INTO draft_versions (draft_id, version, snapshot, content, created_at) "
+                     "VALUES (?, ?, ?, ?, ?)",
+                     (draft_id, version, snapshot, json.dumps(content if snapshot else delta), now))
+        return version
+
+    def write_drafts(self, rows):
+        with self._write() as conn:
+            for user_id, name, fields in rows:
+                self._save_fields(conn, user_id, name, fields)
+
+    def load_draft(self, user_id, name, fields=None):
+        row = self._conn().execute("SELECT content FROM drafts WHERE name = ? AND user_id = ?",
+                                   (name, user_id)).fetchone()
+        if row is None:
+            return {}
+        content = json.loads(row[0])
+        if fields:
+            return {key: content[key] for key in fields if key in content}
+        return content
+
+    def list_page(self, user_id, after=None, limit=draft_listing.DRAFT_LIST_PAGE_SIZE):
+        # The keyset queries are plain SQL; only the placeholders and timestamps differ.
+        sql, params, limit = draft_listing.page_query(user_id, after, limit)
+        params = [_timestamp(p) if isinstance(p, datetime) else p for p in params]
+        rows = self._conn().execute(sql.replace("%s", "?"), params).fetchall()
+        return draft_listing.page_result([(i, name, topic, _datetime(at)) for i, name, topic, at in rows], limit)
+
+    def list_version(self, user_id, name=None):
+        count, last_modified, draft_modified = self._conn().execute("""
+            SELECT count(*), max(updated_at), max(CASE WHEN name = ? THEN updated_at END)
+            FROM drafts WHERE user_id = ?
+        """, (name, user_id)).fetchone()
+        return count, _utc(last_modified), _utc(draft_modified)
+
+    def load_all_drafts(self, user_id):
+        rows = self._conn().execute("SELECT name, content FROM drafts WHERE user_id = ? ORDER BY name",
+                                    (user_id,)).fetchall()
+        return [(name, json.loads(content)) for name, content in rows]
+
+    def delete_draft(self, user_id, name):
+        with self._write() as conn:
+            conn.execute("DELETE FROM drafts WHERE name = ? AND user_id = ?", (name, user_id))
+
+    def delete_user(self, user_id):
+        with self._write() as conn:
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+
+    def search_drafts(self, user_id, query, page=1, per_page=20):
+        params, page, per_page = draft_search.search_query(user_id, query, page, per_page)
+        expression = match_expression(query)
+        if expression is None:
+            return draft_search.search_result([], query, page, per_page)
+        conn = self._conn()
+        rows = conn.execute(self.SEARCH_SQL, (expression, *params[1:])).fetchall()
+        snippets = dict(conn.execute(self.SNIPPET_SQL.format(",".join("?" * len(rows))),
+                                     (expression, *(row[0] for row in rows))).fetchall()) if rows else {}
+        return draft_search.search_result(
+            [(name, topic, _datetime(at), rank, total, snippets.get(draft_id, ""))
+             for draft_id, name, topic, at, rank, total in rows],
+            query, page, per_page,
+        )
+
+    def list_versions(self, user_id, name, limit=50):
+        rows = self._conn().execute("""
+            SELECT v.version, v.created_at, v.snapshot, v.content
+            FROM draft_versions v JOIN drafts d ON d.id = v.draft_id
+            WHERE d.name = ? AND d.user_id = ?
+            ORDER BY v.version DESC
+            LIMIT ?
+        """, (name, user_id, limit)).fetchall()
+        return [
+            {"version": version, "created_at": _datetime(created_at).isoformat(), "snapshot": bool(snapshot),
+             "changed_fields": None if snapshot else list(json.loads(content))}
+            for version, created_at, snapshot, content in rows
+        ]
+
+    def load_version(self, user_id, name, version):
+        rows = self._conn().execute(draft_versions.LOAD_VERSION_SQL.replace("%s", "?"),
+                                    (name, user_id, version, version)).fetchall()
+        return draft_versions.rebuild([(v, json.loads(content)) for v, content in rows], version)
+
+
+def from_env():
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteStorage()
+    if STORAGE_BACKEND == "postgres":
+        return PostgresStorage()
+    raise ValueError(f"unknown STORAGE_BACKEND {STORAGE_BACKEND!r} (expected postgres or sqlite)")
@@ -1,52 +1,54 @@
 from flask import Flask, render_template, request, send_file, redirect, url_for, flash
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
 import os
 import io
-import json
-import psycopg2
 
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask import session
+from identity import resolve_user_id
+import storage
+from render_cache import RenderCache, cache_key
+from draft_cache import DraftCache
+import render_service
+import pdf_assets
+import export_jobs
+import bulk_export
+import autosave
+import draft_listing
+import compression
+import render_profiler
+import metrics
+import time
+from werkzeug.security import check_password_hash
+from flask import session, g, jsonify, abort, Response
+import hashlib
+from werkzeug.http import is_resource_modified
 
 app = Flask(__name__)
-def get_db_connection():
-    return psycopg2.connect(os.environ.get("DATABASE_URL"))
 app.secret_key = 'your_secret_key_here'
-DB_FILE = 'drafts.db'
+
+# Postgres or the embedded SQLite file, per STORAGE_BACKEND (see storage.py).
+store = storage.from_env()
+draft_cache = DraftCache.from_env()
+
+if metrics.METRICS_ENABLED:
+    # Registered first so it runs after every other after_request hook.
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_time(response):
+        if 'request_started' in g:
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - g.request_started,
+                            endpoint=request.endpoint or "unmatched", method=request.method,
+                            status=response.status_code)
+        return response
 
 def init_db():
-    conn = get_db_connection()
-    c = conn.cursor()
-
-    # Create users table
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    # Update drafts table to associate drafts with users
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS drafts (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-            name TEXT NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(name, user_id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-
-init_db()
+    return store.migrate()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema."""
+    init_db()
 
 # --- Helper functions for DB ---
 
@@ -54,122 +56,211 @@ import uuid
 from flask import make_response
 
 def get_or_create_user_id():
+    # Resolved at most once per request; every draft helper reuses g.user_id.
+    if 'user_id' in g:
+        return g.user_id
+
     user_id = request.cookies.get('user_id')
     if not user_id:
         # generate new UUID
         user_id = str(uuid.uuid4())
 
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE email = %s", (user_id,))
-    user = c.fetchone()
-    if user:
-        db_user_id = user[0]
-    else:
-        c.execute(
-            "INSERT INTO users (email, password_hash) VALUES (%s, %s) RETURNING id",
-            (user_id, generate_password_hash("temporary"))
-        )
-        db_user_id = c.fetchone()[0]
-        conn.commit()
-    conn.close()
-
+    with metrics.span("identity.resolve"):
+        g.user_id = resolve_user_id(user_id, store.upsert_user)
     # Store the UUID as a cookie in the response later
-    request.user_cookie_id = user_id  # store temporarily for response to use
-    return db_user_id
+    g.user_cookie_id = user_id
+    return g.user_id
+
+@app.after_request
+def set_user_cookie(response):
+    if 'user_cookie_id' in g:
+        response.set_cookie('user_id', g.user_cookie_id, max_age=60*60*24*365)  # 1 year
+    return response
+
+@metrics.timed("db.write_drafts")
+def write_drafts(rows):
+    # rows: [(user_id, name, fields)], written in one transaction. Only changed
+    # fields are sent, and a save that changes nothing writes nothing.
+    store.write_drafts(rows)
+    for user_id, name, _ in rows:
+        draft_cache.invalidate(user_id, name)
+    metrics.inc("drafts_saved_total", len(rows))
+
+# Ordering between autosaves, full saves and deletes holds within one worker
+# process. Edits buffered in another worker still flush up to
+# AUTOSAVE_FLUSH_INTERVAL later and win over a save made here in the meantime.
+autosave_buffer = autosave.AutosaveBuffer(write_drafts)
 
 def save_draft_to_db(name, content_dict):
+    # Any buffered autosave edits for the draft are written first, in the same batch.
+    autosave_buffer.write([(get_or_create_user_id(), name, strip_nul(content_dict))])
+
+@metrics.timed("db.load_draft")
+def load_draft_from_db(name, fields=None, updated_at=None):
+    # fields: optional list of keys to project server-side instead of the whole draft.
+    # updated_at: the row's timestamp, when the caller has already read it
+    # (store.list_version); whole-draft loads are then served from draft_cache.
     user_id = get_or_create_user_id()
-    conn = get_db_connection()
-    c = conn.cursor()
-    json_data = json.dumps(content_dict)
-    c.execute("""
-        INSERT INTO drafts (name, content, user_id)
-        VALUES (%s, %s, %s)
-        ON CONFLICT (name, user_id)
-        DO UPDATE SET content = EXCLUDED.content,
-                      updated_at = CURRENT_TIMESTAMP
-    """, (name, json_data, user_id))
-    conn.commit()
-    conn.close()
-
-def load_draft_from_db(name):
-    user_id = get_or_create_user_id()
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT content FROM drafts WHERE name = %s AND user_id = %s", (name, user_id))
-    row = c.fetchone()
-    conn.close()
-    if row:
-        return json.loads(row[0])
-    return {}
-
-def list_drafts():
-    user_id = get_or_create_user_id()
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT name FROM drafts WHERE user_id = %s", (user_id,))
-    drafts = [row[0] for row in c.fetchall()]
-    conn.close()
-    return drafts
-
+    autosave_buffer.flush(user_id, name)
+    if updated_at is None or fields:
+        return store.load_draft(user_id, name, fields)
+    content = draft_cache.get(user_id, name, updated_at)
+    if content is None:
+        content = store.load_draft(user_id, name)
+        draft_cache.put(user_id, name, updated_at, content)
+    return content
+
+@metrics.timed("db.list_drafts")
+def list_drafts(after=None, limit=draft_listing.DRAFT_LIST_PAGE_SIZE):
+    # One page of drafts, most recently updated first, plus the cursor for the next page.
+    return store.list_page(get_or_create_user_id(), after, limit)
+
+@metrics.timed("db.load_all_drafts")
+def load_all_drafts():
+    return store.load_all_drafts(get_or_create_user_id())
+
+@metrics.timed("db.delete_draft")
 def delete_draft(name):
     user_id = get_or_create_user_id()
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("DELETE FROM drafts WHERE name = %s AND user_id = %s", (name, user_id))
-    conn.commit()
-    conn.close()
-
-# --- PDF utilities ---
-def draw_wrapped_text(p, x, y, text, max_width, font_name=None, font_size=None, line_height=14):
-    if font_name and font_size:
-        p.setFont(font_name, font_size)
-    words = text.split()
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = current_line + " " + word if current_line else word
-        if p.stringWidth(test_line, font_name, font_size) <= max_width:
-            current_line = test_line
-        else:
-            lines.append(current_line)
-            current_line = word
-    if current_line:
-        lines.append(current_line)
-    for line in lines:
-        p.drawString(x, y, line)
-        y -= line_height
-    return len(lines) * line_height
-
-def get_text_height(text, max_width, font_name="Helvetica", font_size=10, line_height=14):
-    dummy = canvas.Canvas(io.BytesIO())
-    dummy.setFont(font_name, font_size)
-    words = text.split()
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = current_line + " " + word if current_line else word
-        if dummy.stringWidth(test_line, font_name, font_size) <= max_width:
-            current_line = test_line
+    autosave_buffer.delete(user_id, name, store.delete_draft)
+    draft_cache.invalidate(user_id, name)
+    metrics.inc("drafts_deleted_total")
+
+# Bump whenever render_pdf's output changes for the same form data (layout,
+# fonts) so cached PDFs from the old layout are not served.
+PDF_LAYOUT_VERSION = 4
+# Page compression changes the bytes as well, and so does replacing an image
+# under static/ (picked up at the next start), so both are part of the cache key.
+PDF_CACHE_VERSION = (f"{PDF_LAYOUT_VERSION}-z{os.environ.get('PDF_PAGE_COMPRESSION', '1')}"
+                     f"-i{pdf_assets.fingerprint()}")
+
+pdf_cache = RenderCache.from_env(PDF_CACHE_VERSION)
+
+def render_cached_pdf(data, profile=False):
+    # profile: run a cache miss under render_profiler (see should_profile).
+    if profile:
+        return pdf_cache.get_or_render(data, lambda data: render_service.render(data, profile=True))
+    return pdf_cache.get_or_render(data, render_service.render)
+
+def _render_cache_metrics():
+    stats = pdf_cache.stats()
+    drafts = draft_cache.stats()
+    return [
+        ("pdf_render_cache_requests_total", "counter", "Render cache lookups.", {"result": "hit"}, stats["hits"]),
+        ("pdf_render_cache_requests_total", "counter", "Render cache lookups.", {"result": "miss"}, stats["misses"]),
+        ("pdf_render_cache_bytes", "gauge", "Bytes held by the render cache.", {}, stats["bytes"]),
+        ("draft_cache_requests_total", "counter", "Parsed draft cache lookups.", {"result": "hit"}, drafts["hits"]),
+        ("draft_cache_requests_total", "counter", "Parsed draft cache lookups.", {"result": "miss"}, drafts["misses"]),
+        ("draft_cache_invalidations_total", "counter", "Draft cache entries dropped by saves and deletes.", {},
+         drafts["invalidations"]),
+        ("draft_cache_bytes", "gauge", "Bytes held by the draft cache.", {}, drafts["bytes"]),
+        ("autosave_pending_drafts", "gauge", "Drafts with buffered autosave edits.", {}, autosave_buffer.pending_count()),
+    ]
+
+metrics.register_collector(_render_cache_metrics)
+
+# --- HTTP caching ---
+# Pages and PDFs depend on the user cookie, so caches must key on it and
+# revalidate every time; the ETag checks are cheap enough to answer with a 304
+# before any template is rendered or any PDF is built.
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", 60 * 60 * 24 * 365))  # for fingerprinted static URLs
+FORM_TEMPLATE_VERSION = os.path.getmtime(os.path.join(app.root_path, 'templates', 'form.html'))
+_static_versions = {}
+
+@app.url_defaults
+def static_version(endpoint, values):
+    # Fingerprint static URLs with the file's mtime so they can be cached for good.
+    if endpoint == 'static' and 'filename' in values:
+        filename = values['filename']
+        if filename not in _static_versions:
+            path = os.path.join(app.static_folder, filename)
+            _static_versions[filename] = int(os.path.getmtime(path)) if os.path.isfile(path) else None
+        if _static_versions[filename] is not None:
+            values['v'] = _static_versions[filename]
+
+@app.after_request
+def static_cache_control(response):
+    if request.endpoint == 'static':
+        if 'v' in request.args:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
         else:
-            lines.append(current_line)
-            current_line = word
-    if current_line:
-        lines.append(current_line)
-    return line_height * len(lines) + 10
+            response.cache_control.no_cache = True
+    return response
+
+@app.after_request
+def compress_response(response):
+    return compression.compress_response(response, request.accept_encodings)
+
+def revalidated(response, etag):
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+def not_modified(etag):
+    # A 304 for the current request, or None if the client's copy is stale.
+    if is_resource_modified(request.environ, etag=etag):
+        return None
+    return revalidated(Response(status=304), etag)
+
+def send_pdf(data, download_name):
+    # The render cache key already identifies the PDF's bytes, so it doubles as the ETag.
+    etag = cache_key(data, PDF_CACHE_VERSION)
+    if request.method == 'GET':
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+    metrics.inc("pdf_exports_total", kind="single")
+    try:
+        pdf_bytes = render_cached_pdf(data, profile=render_profiler.should_profile(request.headers))
+    except (render_service.RenderTimeout, render_service.RenderUnavailable) as e:
+        return f"Could not generate the PDF right now: {e}", 503
+    response = send_file(io.BytesIO(pdf_bytes), as_attachment=True, download_name=download_name,
+                         mimetype='application/pdf', etag=False)
+    return revalidated(response, etag)
 
 # --- Routes ---
 @app.route('/', methods=['GET'])
 def form():
     draft_name = request.args.get("draft")
-    data = load_draft_from_db(draft_name) if draft_name else {}
-    response = make_response(render_template('form.html', data=data, drafts=list_drafts(), selected_draft=draft_name))
-
-    if hasattr(request, 'user_cookie_id'):
-        response.set_cookie('user_id', request.user_cookie_id, max_age=60*60*24*365)  # 1 year
-
-    return response
+    user_id = get_or_create_user_id()
+    # Pending autosave edits must land before the validators are read.
+    if draft_name:
+        autosave_buffer.flush(user_id, draft_name)
+    version = store.list_version(user_id, draft_name)
+    # No Last-Modified: the newest updated_at does not move when an older
+    # draft is deleted, so an If-Modified-Since check would return a stale list.
+    etag = form_etag(user_id, draft_name, version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # version[2] is this draft's updated_at, so an unchanged draft comes from draft_cache.
+    data = load_draft_from_db(draft_name, updated_at=version[2]) if draft_name else {}
+    html = render_form(data, list_drafts(), draft_name)
+    return revalidated(make_response(html), etag)
+
+def form_etag(user_id, draft_name, version):
+    # version: store.list_version() for this user and draft. Parts are
+    # joined as text, with timestamps in UTC, so psycopg2 and asyncpg rows
+    # give the same tag.
+    parts = (FORM_TEMPLATE_VERSION, export_jobs.EXPORT_ASYNC, export_jobs.EXPORT_JOB_TIMEOUT,
+             user_id, draft_name, *version)
+    return hashlib.sha1("|".join(map(draft_listing.version_text, parts)).encode()).hexdigest()
+
+def render_form(data, first_page, draft_name):
+    # Only the first page is rendered; the dropdown fetches the rest from /drafts on demand.
+    page, next_cursor = first_page
+    drafts = [draft["name"] for draft in page]
+    if draft_name and draft_name not in drafts and data:
+        drafts.insert(0, draft_name)
+    with metrics.span("template.render"):
+        return render_template('form.html', data=data, drafts=drafts, drafts_next=next_cursor,
+                               selected_draft=draft_name, export_async=export_jobs.EXPORT_ASYNC,
+                               export_timeout=export_jobs.EXPORT_JOB_TIMEOUT)
 
 @app.route('/submit', methods=['POST'])
 def submit():
@@ -192,121 +283,143 @@ def submit():
         return redirect(url_for('form'))
 
     # --- PDF Generation ---
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    p.setFillColorRGB(0.15, 0.18, 0.25)
-    p.rect(0, height - 70, width, 70, fill=1, stroke=0)
-    p.setFillColor(colors.white)
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(50, height - 30, "Turning Point for God")
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, height - 50, "Strategic / Ad hoc Topic Summary")
-    logo_path = os.path.join("static", "overlay_icon.png")
-    if os.path.exists(logo_path):
-        p.drawImage(logo_path, width - 70, height - 60, width=40, height=40, mask='auto')
-
-    p.setFillColor(colors.black)
-    y = height - 90
-    top_fields = [
-        ("Topic", data.get("Topic", "")),
-        ("Point Person", data.get("PointPerson", "")),
-        ("Role of Executive Team (consult, inform, decide)", data.get("Role", "")),
-        ("Executive Sponsor", data.get("Sponsor", "")),
-        ("Problem Definition", data.get("Problem", "")),
-        ("Outcome Description", data.get("Outcome", "")),
-        ("Primary Recommendation", data.get("Recommendation", ""))
-    ]
-    for label, val in top_fields:
-        box_height = get_text_height(val, width - 100)
-        if y - box_height < 60:
-            p.showPage()
-            y = height - 50
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(50, y, label)
-        p.rect(50, y - box_height - 5, width - 100, box_height, stroke=1, fill=0)
-        p.setFont("Helvetica", 10)
-        draw_wrapped_text(p, 55, y - 20, val, width - 110)
-        y -= (box_height + 25)
-
-    p.showPage()
-    y = height - 90
-
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(50, y, "Options Table")
-    y -= 20
-
-    rows = [
-        ("Description", [data.get("Option1Description", ""), data.get("Option2Description", ""), data.get("Option3Description", "")]),
-        ("Pros", [data.get("Option1Pros", ""), data.get("Option2Pros", ""), data.get("Option3Pros", "")]),
-        ("Cons", [data.get("Option1Cons", ""), data.get("Option2Cons", ""), data.get("Option3Cons", "")]),
-        ("Benefits/Revenue", [data.get("Option1Benefits/Revenue", ""), data.get("Option2Benefits/Revenue", ""), data.get("Option3Benefits/Revenue", "")]),
-        ("Obstacles", [data.get("Option1Obstacles", ""), data.get("Option2Obstacles", ""), data.get("Option3Obstacles", "")])
-    ]
-    col_width = (width - 100) / 4
-    p.setFont("Helvetica-Bold", 11)
-    p.rect(50, y - 20, col_width, 20, stroke=1, fill=0)
-    for i, header in enumerate(["Option 1", "Option 2", "Option 3"]):
-        x = 50 + col_width * (i + 1)
-        p.rect(x, y - 20, col_width, 20, stroke=1, fill=0)
-        p.drawCentredString(x + col_width / 2, y - 15, header)
-    y -= 30
-
-    for label, options in rows:
-        heights = [get_text_height(txt, col_width - 10) for txt in options]
-        row_h = max(heights) + 20
-        if y - row_h < 60:
-            p.showPage()
-            y = height - 50
-        p.setFont("Helvetica-Bold", 10)
-        p.rect(50, y - row_h, col_width, row_h, stroke=1, fill=0)
-        draw_wrapped_text(p, 55, y - 20, label, col_width - 10, "Helvetica-Bold", 11)
-        for i in range(3):
-            x = 50 + (i + 1) * col_width
-            p.setFont("Helvetica", 10)
-            p.rect(x, y - row_h, col_width, row_h, stroke=1, fill=0)
-            draw_wrapped_text(p, x + 5, y - 20, options[i], col_width - 10)
-        y -= (row_h + 10)
-        y -= 8
-
-    decision = data.get("Decision", "")
-    box_height = get_text_height(decision, width - 100)
-    if y - box_height < 60:
-        p.showPage()
-        y = height - 50
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(50, y, "Final Decision")
-    p.rect(50, y - box_height - 5, width - 100, box_height, stroke=1, fill=0)
-    p.setFont("Helvetica", 10)
-    draw_wrapped_text(p, 55, y - 20, decision, width - 110)
-    y -= (box_height + 15)
-    y -= 20
-
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(50, y, "Key Actions: (Who, What, When?)")
-    y -= 10
-    for i in range(1, 6):
-        action = data.get(f"Action{i}", "")
-        box_height = get_text_height(action, width - 130)
-        if y - box_height < 60:
-            p.showPage()
-            y = height - 50
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(55, y - 15, f"{i}.")
-        p.rect(75, y - box_height - 5, width - 120, box_height, stroke=1, fill=0)
-        p.setFont("Helvetica", 10)
-        draw_wrapped_text(p, 80, y - 20, action, width - 130)
-        y -= (box_height + 15)
-
-    logo_path = os.path.join("static", "logo.png")
-    if os.path.exists(logo_path):
-        p.drawImage(logo_path, 50, 20, width=80, height=30, mask='auto')  # Adjust size/position as needed
-     
-
-    p.save()
-    buffer.seek(0)
     pdf_filename = f"{draft_name or 'Strategic_Topic_Summary'}.pdf"
-    return send_file(buffer, as_attachment=True, download_name=pdf_filename, mimetype='application/pdf')
+    if data.get("async") == "1":
+        metrics.inc("pdf_exports_total", kind="async")
+        job_id = export_jobs.submit_job(get_or_create_user_id(), data, pdf_filename, render_cached_pdf)
+        return jsonify(export_job_json(export_jobs.get_job(job_id, g.user_id))), 202
+
+    return send_pdf(data, pdf_filename)
+
+def export_job_json(job):
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "error": job["error"],
+        "status_url": url_for('export_status', job_id=job["id"]),
+        "download_url": url_for('export_download', job_id=job["id"]) if job["status"] == export_jobs.DONE else None,
+    }
+
+@app.route('/drafts', methods=['GET'])
+def draft_index():
+    limit = request.args.get("limit", draft_listing.DRAFT_LIST_PAGE_SIZE, type=int)
+    try:
+        drafts, next_cursor = list_drafts(request.args.get("after"), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"drafts": drafts, "next": next_cursor})
+
+@app.route('/drafts/search', methods=['GET'])
+def search_drafts():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "missing q"}), 400
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 20, type=int)
+    with metrics.span("db.search_drafts"):
+        result = store.search_drafts(get_or_create_user_id(), query, page, per_page)
+    for hit in result["results"]:
+        hit["url"] = url_for('form', draft=hit["name"])
+    return jsonify(result)
+
+AUTOSAVE_FORMAT_ERROR = 'expected {"fields": {name: text}}'
+
+def strip_nul(fields):
+    # JSONB rejects \u0000, and no form field needs it.
+    return {key.replace("\x00", ""): str(value).replace("\x00", "") for key, value in fields.items()}
+
+def autosave_fields(payload):
+    # The {field: text} map from an autosave body, or None if it is malformed.
+    fields = payload.get("fields") if isinstance(payload, dict) else None
+    if not isinstance(fields, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in fields.items()):
+        return None
+    return strip_nul(fields)
+
+@app.route('/drafts/<path:name>/autosave', methods=['POST'])
+def autosave_draft(name):
+    fields = autosave_fields(request.get_json(silent=True))
+    if fields is None:
+        return jsonify({"error": AUTOSAVE_FORMAT_ERROR}), 400
+    if fields:
+        autosave_buffer.add(get_or_create_user_id(), name, fields)
+    return jsonify({"queued": len(fields)}), 202
+
+@app.route('/drafts/<path:name>/pdf', methods=['GET'])
+def export_draft(name):
+    # Bookmarkable export of the saved draft; repeat downloads revalidate with a 304.
+    data = load_draft_from_db(name)
+    if not data:
+        abort(404)
+    return send_pdf(data, f"{name}.pdf")
+
+@app.route('/drafts/<path:name>/versions', methods=['GET'])
+def draft_history(name):
+    limit = max(min(request.args.get("limit", 50, type=int), 500), 1)
+    versions = store.list_versions(get_or_create_user_id(), name, limit)
+    return jsonify({"draft": name, "versions": versions})
+
+def load_draft_version(name, version):
+    content = store.load_version(get_or_create_user_id(), name, version)
+    if content is None:
+        abort(404)
+    return content
+
+@app.route('/drafts/<path:name>/versions/<int:version>/restore', methods=['POST'])
+def restore_draft_version(name, version):
+    content = load_draft_version(name, version)
+    # Saves merge, so blank out fields that did not exist in that version.
+    current = load_draft_from_db(name)
+    save_draft_to_db(name, {**{key: "" for key in current if key not in content}, **content})
+    flash(f"Draft '{name}' restored to version {version}.")
+    return redirect(url_for('form', draft=name))
+
+@app.route('/drafts/<path:name>/versions/<int:version>/pdf', methods=['GET'])
+def export_draft_version(name, version):
+    return send_pdf(load_draft_version(name, version), f"{name} v{version}.pdf")
+
+@app.route('/exports/all', methods=['GET'])
+def export_all():
+    drafts = load_all_drafts()
+    if not drafts:
+        return "No saved drafts to export.", 404
+
+    metrics.inc("pdf_exports_total", kind="merged" if request.args.get("format") == "pdf" else "zip")
+    if request.args.get("format") == "pdf":
+        try:
+            pdf_bytes = render_service.render_merged(drafts, profile=render_profiler.should_profile(request.headers))
+        except (render_service.RenderTimeout, render_service.RenderUnavailable) as e:
+            return f"Could not generate the PDF right now: {e}", 503
+        return send_file(io.BytesIO(pdf_bytes), as_attachment=True, download_name="Topic_Summaries.pdf",
+                         mimetype='application/pdf')
+
+    # Drafts render in parallel and each PDF is streamed into the ZIP as soon as it is ready.
+    pdfs = bulk_export.render_in_order(drafts, render_cached_pdf)
+    response = Response(bulk_export.stream_zip(pdfs), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename="Topic_Summaries.zip"'
+    return response
+
+@app.route('/exports/<job_id>', methods=['GET'])
+def export_status(job_id):
+    job = export_jobs.get_job(job_id, get_or_create_user_id())
+    if job is None:
+        abort(404)
+    return jsonify(export_job_json(job))
+
+@app.route('/exports/<job_id>/pdf', methods=['GET'])
+def export_download(job_id):
+    job = export_jobs.get_job(job_id, get_or_create_user_id())
+    if job is None:
+        abort(404)
+    if job["status"] != export_jobs.DONE:
+        return jsonify(export_job_json(job)), 409
+    return send_file(export_jobs.pdf_path(job_id), as_attachment=True, download_name=job["filename"],
+                     mimetype='application/pdf')
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    if not metrics.METRICS_ENABLED:
+        abort(404)
+    return Response(metrics.render_text(), mimetype='text/plain; version=0.0.4')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from autosave import AutosaveBuffer
+
+
+class FakeStore:
+    # A writer that merges rows into a dict, like write_drafts does. Rows with
+    # a "bad" field are rejected, and "slow" rows hold the write until released.
+    def __init__(self):
+        self.drafts = {}
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+        self.writing = threading.Event()
+
+    def write(self, rows):
+        if any("bad" in fields for _, _, fields in rows):
+            raise ValueError("rejected")
+        self.batches.append([name for _, name, _ in rows])
+        for user_id, name, fields in rows:
+            if "slow" in fields:
+                self.writing.set()
+                self.release.wait(5)
+            self.drafts.setdefault((user_id, name), {}).update(
+                {key: value for key, value in fields.items() if key != "slow"})
+
+    def delete(self, user_id, name):
+        self.drafts.pop((user_id, name), None)
+
+
+@pytest.fixture
+def store():
+    return FakeStore()
+
+
+@pytest.fixture
+def buffer(store):
+    # A long interval keeps the background flusher out of the way.
+    return AutosaveBuffer(store.write, interval=3600, max_attempts=2)
+
+
+def _flush_in_background(buffer, store):
+    store.release.clear()
+    thread = threading.Thread(target=buffer.flush)
+    thread.start()
+    assert store.writing.wait(5)
+    return thread
+
+
+def test_edits_to_one_draft_are_merged_into_one_row(buffer, store):
+    buffer.add(1, "d", {"Topic": "a"})
+    buffer.add(1, "d", {"Topic": "b", "Problem": "p"})
+    assert buffer.flush() == 1
+    assert store.batches == [["d"]]
+    assert store.drafts[(1, "d")] == {"Topic": "b", "Problem": "p"}
+
+
+def test_flush_of_one_draft_leaves_the_others_pending(buffer, store):
+    buffer.add(1, "a", {"Topic": "a"})
+    buffer.add(1, "b", {"Topic": "b"})
+    assert buffer.flush(1, "a") == 1
+    assert buffer.pending_count() == 1
+    assert buffer.flush(1, "nothing") == 0
+
+
+def test_full_save_writes_older_edits_first(buffer, store):
+    buffer.add(1, "d", {"Topic": "autosaved", "Problem": "p"})
+    buffer.write([(1, "d", {"Topic": "saved"})])
+    assert store.drafts[(1, "d")] == {"Topic": "saved", "Problem": "p"}
+    assert buffer.pending_count() == 0
+
+
+def test_full_save_waits_for_a_batch_in_flight(buffer, store):
+    buffer.add(1, "d", {"Topic": "autosaved older text", "slow": "1"})
+    thread = _flush_in_background(buffer, store)
+    saver = threading.Thread(target=buffer.write, args=([(1, "d", {"Topic": "saved"})],))
+    saver.start()
+    time.sleep(0.05)
+    store.release.set()
+    thread.join()
+    saver.join()
+    assert store.drafts[(1, "d")]["Topic"] == "saved"
+
+
+def test_delete_waits_for_a_batch_in_flight(buffer, store):
+    buffer.add(1, "d", {"Topic": "x", "slow": "1"})
+    thread = _flush_in_background(buffer, store)
+    deleter = threading.Thread(target=buffer.delete, args=(1, "d", store.delete))
+    deleter.start()
+    time.sleep(0.05)
+    store.release.set()
+    thread.join()
+    deleter.join()
+    assert (1, "d") not in store.drafts
+
+
+def test_delete_drops_pending_edits(buffer, store):
+    buffer.add(1, "d", {"Topic": "x"})
+    buffer.delete(1, "d", store.delete)
+    assert buffer.flush() == 0
+    assert (1, "d") not in store.drafts
+
+
+def test_flush_of_an_idle_draft_does_not_wait_for_other_drafts(buffer, store):
+    buffer.add(1, "busy", {"Topic": "x", "slow": "1"})
+    thread = _flush_in_background(buffer, store)
+    start = time.perf_counter()
+    assert buffer.flush(2, "idle") == 0
+    assert time.perf_counter() - start < 0.5
+    store.release.set()
+    thread.join()
+
+
+def test_a_bad_row_does_not_block_the_rest_of_the_batch(buffer, store):
+    buffer.add(1, "good", {"Topic": "g"})
+    buffer.add(1, "bad", {"bad": "x"})
+    assert buffer.flush() == 1
+    assert store.drafts == {(1, "good"): {"Topic": "g"}}
+    # Put back for another attempt, keeping newer edits on top.
+    buffer.add(1, "bad", {"Topic": "newer"})
+    assert buffer.pending_count() == 1
+    assert buffer.flush(1, "bad") == 0
+    # Dropped after max_attempts, so the draft is usable again.
+    assert buffer.pending_count() == 0
+    buffer.write([(1, "bad", {"Topic": "saved"})])
+    assert store.drafts[(1, "bad")] == {"Topic": "saved"}
+
+
+def test_full_save_drops_older_edits_that_cannot_be_written(buffer, store):
+    buffer.add(1, "d", {"bad": "x"})
+    buffer.write([(1, "d", {"Topic": "saved"})])
+    assert store.drafts[(1, "d")] == {"Topic": "saved"}
+    assert buffer.pending_count() == 0
+
+
+def test_full_save_that_fails_is_raised(buffer, store):
+    with pytest.raises(ValueError):
+        buffer.write([(1, "d", {"bad": "x"})])
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from draft_listing import decode_cursor, encode_cursor, version_text
+
+
+def test_cursor_round_trips():
+    updated_at = datetime(2026, 3, 1, 12, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(updated_at, 42)) == (updated_at, 42)
+
+
+def test_cursor_keeps_the_timezone():
+    updated_at = datetime(2026, 3, 1, 12, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert decode_cursor(encode_cursor(updated_at, 7)) == (updated_at, 7)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(datetime(2026, 3, 1), 1)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "garbage", "!!!", encode_cursor(datetime(2026, 1, 1), 1)[:-3] + "***"])
+def test_bad_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_version_text_is_the_same_in_any_zone():
+    utc = datetime(2026, 3, 1, 3, 0, tzinfo=timezone.utc)
+    tokyo = utc.astimezone(timezone(timedelta(hours=9)))
+    assert version_text(utc) == version_text(tokyo)
+    assert version_text(None) == "None"
@@ -0,0 +1,30 @@
+from draft_versions import compute_delta, is_snapshot, rebuild
+
+
+def test_rebuild_applies_deltas_over_the_snapshot():
+    rows = [
+        (20, {"Topic": "t", "Problem": "p"}),
+        (21, {"Problem": "p2"}),
+        (22, {"Outcome": "o"}),
+    ]
+    assert rebuild(rows, 22) == {"Topic": "t", "Problem": "p2", "Outcome": "o"}
+
+
+def test_rebuild_of_a_snapshot_alone():
+    assert rebuild([(1, {"Topic": "t"})], 1) == {"Topic": "t"}
+
+
+def test_rebuild_of_a_missing_version_is_none():
+    assert rebuild([], 3) is None
+    # The query stops at the newest version that exists.
+    assert rebuild([(1, {"Topic": "t"}), (2, {"Topic": "u"})], 3) is None
+
+
+def test_compute_delta_keeps_only_changed_fields():
+    assert compute_delta({"a": "1", "b": "2"}, {"a": "1", "b": "3", "c": "4"}) == {"b": "3", "c": "4"}
+    assert compute_delta({"a": "1"}, {"a": "1"}) == {}
+
+
+def test_snapshots_are_the_first_and_every_nth_version(monkeypatch):
+    monkeypatch.setattr("draft_versions.DRAFT_SNAPSHOT_EVERY", 5)
+    assert [v for v in range(1, 12) if is_snapshot(v)] == [1, 5, 10]
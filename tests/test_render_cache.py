@@ -0,0 +1,38 @@
+from render_cache import MemoryCache
+
+
+def test_evicts_least_recently_used_first():
+    cache = MemoryCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"  # a is now the most recent
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa" and cache.get("c") == b"cccc"
+    assert cache.size == 8
+
+
+def test_values_larger_than_the_cache_are_not_stored():
+    cache = MemoryCache(max_bytes=4)
+    cache.put("a", b"aaa")
+    cache.put("big", b"bbbbb")
+    assert cache.get("big") is None
+    assert cache.get("a") == b"aaa"
+
+
+def test_replacing_a_key_updates_the_size():
+    cache = MemoryCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("a", b"aa")
+    assert cache.size == 2
+
+
+def test_delete_and_a_custom_sizeof():
+    cache = MemoryCache(max_bytes=100, sizeof=lambda entry: entry[1])
+    cache.put("a", ("parsed", 60))
+    cache.put("b", ("parsed", 30))
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.size == 30
+    cache.put("c", ("parsed", 80))
+    assert cache.get("b") is None and cache.size == 80
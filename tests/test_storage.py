@@ -0,0 +1,68 @@
+import pytest
+
+from storage import SqliteStorage, match_expression
+
+
+@pytest.mark.parametrize("query, expression", [
+    ("budget", '("budget")'),
+    ("volunteer training", '("volunteer") AND ("training")'),
+    ('"youth outreach" budget', '("youth outreach") AND ("budget")'),
+    ("budget or grants", '("budget" OR "grants")'),
+    ("budget -grants", '(("budget")) NOT "grants"'),
+    ('"unclosed phrase', '("unclosed phrase")'),
+])
+def test_match_expression(query, expression):
+    assert match_expression(query) == expression
+
+
+@pytest.mark.parametrize("query", ["", "   ", "-budget", "or", "* ( ) :"])
+def test_match_expression_without_terms_is_none(query):
+    assert match_expression(query) is None
+
+
+def test_fts5_syntax_is_quoted_away():
+    assert match_expression('NEAR(a b) col:value "x" AND') == '("NEAR a") AND ("b") AND ("col value") AND ("x") AND ("AND")'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStorage(str(tmp_path / "drafts.db"))
+    store.migrate(log=lambda message: None)
+    yield store
+    store.close()
+
+
+def test_migrate_is_idempotent(store):
+    messages = []
+    store.migrate(log=messages.append)
+    assert messages == ["Schema is up to date (version 2)."]
+
+
+def test_sqlite_round_trip(store):
+    user_id = store.upsert_user("cookie")
+    assert store.upsert_user("cookie") == user_id
+    for i in range(5):
+        store.write_drafts([(user_id, f"d{i}", {"Topic": f"Topic {i}", "Problem": "volunteer training"})])
+    store.write_drafts([(user_id, "d1", {"Outcome": "more volunteers"})])
+
+    assert store.load_draft(user_id, "d1") == {"Topic": "Topic 1", "Problem": "volunteer training",
+                                               "Outcome": "more volunteers"}
+    assert store.load_draft(user_id, "d1", ["Topic"]) == {"Topic": "Topic 1"}
+
+    page, cursor = store.list_page(user_id, limit=3)
+    assert [draft["name"] for draft in page] == ["d1", "d4", "d3"]
+    rest, end = store.list_page(user_id, cursor, limit=3)
+    assert [draft["name"] for draft in rest] == ["d2", "d0"] and end is None
+
+    # Names are indexed too, so -d3 excludes that draft.
+    result = store.search_drafts(user_id, "volunteers -d3", per_page=10)
+    assert result["total"] == 4
+    assert "d3" not in [hit["name"] for hit in result["results"]]
+
+    assert [v["version"] for v in store.list_versions(user_id, "d1")] == [2, 1]
+    assert store.load_version(user_id, "d1", 1) == {"Topic": "Topic 1", "Problem": "volunteer training"}
+
+    store.delete_draft(user_id, "d1")
+    assert store.load_draft(user_id, "d1") == {}
+    assert store.search_drafts(user_id, "more")["total"] == 0
+    assert store.list_version(user_id)[0] == 4
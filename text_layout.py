@@ -0,0 +1,88 @@
+from functools import lru_cache
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# --- Text measurement ---
+# Widths are kept in font units (1/1000 of the font size), the same integers
+# reportlab sums internally, so cached measurements match stringWidth().
+# The caches are keyed on user text, so only short strings are cached: that
+# keeps them under about 10 MB per process however large the submitted fields are.
+CACHED_WORD_MAX_LEN = 64
+CACHED_TEXT_MAX_LEN = 512
+
+_glyph_tables = {}  # font name -> {char: width in font units}
+
+
+def _glyph_table(font_name):
+    table = _glyph_tables.get(font_name)
+    if table is None:
+        table = _glyph_tables[font_name] = {}
+    return table
+
+
+def _word_units(word, font_name):
+    table = _glyph_table(font_name)
+    units = 0
+    for ch in word:
+        width = table.get(ch)
+        if width is None:
+            width = table[ch] = stringWidth(ch, font_name, 1000)
+        units += width
+    return units
+
+
+_cached_word_units = lru_cache(maxsize=16384)(_word_units)
+
+
+def word_units(word, font_name):
+    if len(word) <= CACHED_WORD_MAX_LEN:
+        return _cached_word_units(word, font_name)
+    return _word_units(word, font_name)
+
+
+# --- Line wrapping ---
+def _wrap_text(text, max_width, font_name, font_size):
+    # Greedy word wrap. Each word is measured once and line widths are running
+    # sums, instead of re-measuring the whole line for every added word.
+    # Returns a tuple so the cached result can be shared by measure and draw.
+    space = word_units(" ", font_name)
+    lines = []
+    current = []
+    current_units = 0
+    for word in text.split():
+        units = word_units(word, font_name)
+        test_units = current_units + space + units if current else units
+        if test_units * 0.001 * font_size <= max_width:
+            current.append(word)
+            current_units = test_units
+        else:
+            # A word wider than the box still gets a line of its own.
+            if current:
+                lines.append(" ".join(current))
+            current = [word]
+            current_units = units
+    if current:
+        lines.append(" ".join(current))
+    return tuple(lines)
+
+
+_cached_wrap_text = lru_cache(maxsize=1024)(_wrap_text)
+
+
+def wrap_text(text, max_width, font_name="Helvetica", font_size=10):
+    if len(text) <= CACHED_TEXT_MAX_LEN:
+        return _cached_wrap_text(text, max_width, font_name, font_size)
+    return _wrap_text(text, max_width, font_name, font_size)
+
+
+def clear_caches(words=True):
+    _cached_wrap_text.cache_clear()
+    if words:
+        _cached_word_units.cache_clear()
+
+
+def draw_lines(p, x, y, lines, line_height=14):
+    for line in lines:
+        p.drawString(x, y, line)
+        y -= line_height
+    return len(lines) * line_height